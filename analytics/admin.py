@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import DailyMetric, StatsSnapshot
+
+@admin.register(StatsSnapshot)
+class StatsSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('id', 'updated_at')
+
+@admin.register(DailyMetric)
+class DailyMetricAdmin(admin.ModelAdmin):
+    list_display = ('date', 'signups', 'logins', 'active_families', 'expenses_created', 'chat_messages', 'pushes_delivered', 'computed_at')
+    date_hierarchy = 'date'
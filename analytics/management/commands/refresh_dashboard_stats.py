@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from analytics.stats import refresh_dashboard_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the admin dashboard statistics snapshot. Run on a schedule (e.g. every 10 minutes from cron)."
+
+    def handle(self, *args, **options):
+        snapshot = refresh_dashboard_stats()
+        self.stdout.write(self.style.SUCCESS(f"Dashboard stats refreshed at {snapshot.updated_at:%Y-%m-%d %H:%M:%S}."))
@@ -0,0 +1,33 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from analytics.rollups import last_final_day, rollup_days
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll the raw tables up into daily growth metrics. Only days that are not "
+        "final yet are computed, so run it frequently (e.g. hourly) and at least "
+        "once shortly after midnight."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backfill-days', type=int, default=365,
+                            help="How far back to start when nothing has been rolled up yet.")
+        parser.add_argument('--since', type=date.fromisoformat, default=None,
+                            help="Recompute every day from this date (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options['since']:
+            start = options['since']
+        else:
+            final = last_final_day()
+            start = final + timedelta(days=1) if final else today - timedelta(days=options['backfill_days'] - 1)
+        if start > today:
+            raise CommandError("--since must not be in the future.")
+
+        written = rollup_days(start, today)
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {written} day(s) from {start} to {today}."))
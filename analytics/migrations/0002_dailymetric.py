@@ -0,0 +1,30 @@
+# Generated by Django 5.2.9 on 2026-10-19 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('signups', models.PositiveIntegerField(default=0)),
+                ('logins', models.PositiveIntegerField(default=0)),
+                ('active_families', models.PositiveIntegerField(default=0)),
+                ('expenses_created', models.PositiveIntegerField(default=0)),
+                ('chat_messages', models.PositiveIntegerField(default=0)),
+                ('pushes_delivered', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import models
+
+class StatsSnapshot(models.Model):
+    """
+    Latest admin dashboard totals. A single row (pk=1) rewritten by
+    `manage.py refresh_dashboard_stats` or the dashboard's refresh button,
+    so page loads never run the full-table counts themselves.
+    """
+    data = models.JSONField(default=dict)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Dashboard stats @ {self.updated_at}"
+
+
+class DailyMetric(models.Model):
+    """
+    One row per (local) day of growth counters for the admin dashboard charts.
+
+    Everything except `pushes_delivered` is rolled up from the raw tables by
+    `manage.py rollup_daily_metrics`; pushes are counted as they are sent.
+    """
+    date = models.DateField(unique=True)
+    signups = models.PositiveIntegerField(default=0)
+    logins = models.PositiveIntegerField(default=0)
+    active_families = models.PositiveIntegerField(default=0)
+    expenses_created = models.PositiveIntegerField(default=0)
+    chat_messages = models.PositiveIntegerField(default=0)
+    pushes_delivered = models.PositiveIntegerField(default=0)
+    # When the rolled-up columns were last computed; a day is final once this is past its end
+    computed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['date']
+
+    def __str__(self):
+        return f"Metrics for {self.date}"
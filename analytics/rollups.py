@@ -0,0 +1,162 @@
+"""
+Daily growth rollups for the admin dashboard charts.
+
+`rollup_days()` aggregates the raw tables into DailyMetric rows with one
+grouped query per metric for the whole range, and `growth_series()` reads
+the charts back from DailyMetric alone.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from chat.models import Message
+from expenses.models import Expense
+from self_manager_backend.routers import read_replica
+from .models import DailyMetric
+
+SERIES_RANGES = (30, 90, 365)
+
+# (column, label) in display order
+METRICS = [
+    ('signups', 'Signups'),
+    ('logins', 'Logins'),
+    ('active_families', 'Active families'),
+    ('expenses_created', 'Expenses created'),
+    ('chat_messages', 'Chat messages'),
+    ('pushes_delivered', 'Pushes delivered'),
+]
+ROLLED_UP = ['signups', 'logins', 'active_families', 'expenses_created', 'chat_messages']
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+def _counts_by_day(queryset, field, start, end):
+    rows = (
+        queryset
+        .filter(**{f'{field}__gte': day_start(start), f'{field}__lt': day_start(end + timedelta(days=1))})
+        .annotate(day=TruncDate(field))
+        .values('day')
+        .annotate(n=Count('pk'))
+        .order_by()
+    )
+    return {row['day']: row['n'] for row in rows}
+
+def _active_families_by_day(start, end):
+    """Families with at least one expense or chat message on the day."""
+    window = {'gte': day_start(start), 'lt': day_start(end + timedelta(days=1))}
+    families = defaultdict(set)
+    sources = [
+        (Expense.objects.filter(family__isnull=False), 'created_at'),
+        (Message.objects.all(), 'timestamp'),
+    ]
+    for queryset, field in sources:
+        rows = (
+            queryset
+            .filter(**{f'{field}__{lookup}': value for lookup, value in window.items()})
+            .annotate(day=TruncDate(field))
+            .values_list('day', 'family_id')
+            .distinct()
+            .order_by()
+        )
+        for day, family_id in rows:
+            families[day].add(family_id)
+    return {day: len(ids) for day, ids in families.items()}
+
+
+def compute_days(start, end):
+    """{date: {column: value}} for the rolled-up columns, start..end inclusive."""
+    User = get_user_model()
+    columns = {
+        'signups': _counts_by_day(User.objects.all(), 'date_joined', start, end),
+        # last_login only keeps each user's latest login, so a day's count is
+        # final once the day is over and has been rolled up
+        'logins': _counts_by_day(User.objects.all(), 'last_login', start, end),
+        'active_families': _active_families_by_day(start, end),
+        'expenses_created': _counts_by_day(Expense.objects.all(), 'created_at', start, end),
+        'chat_messages': _counts_by_day(Message.objects.all(), 'timestamp', start, end),
+    }
+    days = {}
+    day = start
+    while day <= end:
+        days[day] = {column: values.get(day, 0) for column, values in columns.items()}
+        day += timedelta(days=1)
+    return days
+
+def rollup_days(start, end):
+    """
+    (Re)compute the rolled-up columns for start..end. pushes_delivered is left
+    untouched on existing rows. Returns the number of days written.
+    """
+    now = timezone.now()
+    rows = [
+        DailyMetric(date=day, computed_at=now, **values)
+        for day, values in compute_days(start, end).items()
+    ]
+    DailyMetric.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['date'],
+        update_fields=[*ROLLED_UP, 'computed_at'],
+    )
+    return len(rows)
+
+def last_final_day():
+    """
+    The newest day whose rollup is final, i.e. was computed after the day
+    ended. Later days (usually just yesterday and today) are recomputed.
+    """
+    for metric in DailyMetric.objects.order_by('-date').only('date', 'computed_at').iterator():
+        if metric.computed_at and metric.computed_at >= day_start(metric.date + timedelta(days=1)):
+            return metric.date
+    return None
+
+
+def record_pushes_delivered(count):
+    """Add `count` delivered pushes to today's row."""
+    if not count:
+        return
+    today = timezone.localdate()
+    if DailyMetric.objects.filter(date=today).update(pushes_delivered=F('pushes_delivered') + count):
+        return
+    try:
+        with transaction.atomic():
+            DailyMetric.objects.create(date=today, pushes_delivered=count)
+    except IntegrityError:
+        # Another process created today's row first
+        DailyMetric.objects.filter(date=today).update(pushes_delivered=F('pushes_delivered') + count)
+
+
+def growth_series(days):
+    """
+    Chart data for the last `days` days (today included), read from
+    DailyMetric only. Missing days count as zero.
+    """
+    end = timezone.localdate()
+    start = end - timedelta(days=days - 1)
+    with read_replica():
+        rows = {
+            row['date']: row
+            for row in DailyMetric.objects.filter(date__gte=start, date__lte=end).values('date', *dict(METRICS))
+        }
+    dates = [start + timedelta(days=offset) for offset in range(days)]
+
+    series = []
+    for column, label in METRICS:
+        values = [rows.get(day, {}).get(column, 0) for day in dates]
+        peak = max(values) or 1
+        series.append({
+            'key': column,
+            'label': label,
+            'total': sum(values),
+            'bars': [
+                {'date': day, 'value': value, 'height': round(value * 100 / peak)}
+                for day, value in zip(dates, values)
+            ],
+        })
+    return {'days': days, 'start': start, 'end': end, 'series': series}
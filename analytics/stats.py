@@ -0,0 +1,96 @@
+"""
+Admin dashboard statistics, shared by `admin_dashboard_view`, the
+communications pages and the `get_dashboard_stats` template tag.
+
+The counts are computed by `refresh_dashboard_stats()` (on a schedule via
+`manage.py refresh_dashboard_stats`, or from the dashboard's refresh button)
+and stored in a StatsSnapshot row; readers only load that row.
+"""
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from expenses.models import Expense
+from families.models import Family
+from notes.models import Note
+from self_manager_backend.routers import read_replica
+from udhar.models import Udhar
+from users.models import Profile
+from .models import StatsSnapshot
+
+SNAPSHOT_ID = 1
+RECENT_USERS = 5
+
+
+def format_size(size):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024:
+            return f"{size:.2f} {unit}"
+        size /= 1024
+    return f"{size:.2f} TB"
+
+def database_size():
+    """Size of the default database in bytes, asked of the database itself."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('PRAGMA page_count')
+            page_count = cursor.fetchone()[0]
+            cursor.execute('PRAGMA page_size')
+            return page_count * cursor.fetchone()[0]
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT pg_database_size(current_database())')
+            return cursor.fetchone()[0]
+    db_path = settings.DATABASES['default']['NAME']
+    return os.path.getsize(db_path) if os.path.exists(db_path) else 0
+
+
+def compute_dashboard_stats():
+    User = get_user_model()
+    now = timezone.now()
+    db_size = database_size()
+
+    # The counts scan whole tables, so they run on the read replica if there is one
+    with read_replica():
+        recent_users = list(User.objects.order_by('-date_joined').values(
+            'email', 'first_name', 'last_name', 'date_joined', 'is_active')[:RECENT_USERS])
+        return {
+            'total_users': User.objects.count(),
+            'active_users': User.objects.filter(is_active=True).count(),
+            'active_users_24h': User.objects.filter(last_login__gte=now - timedelta(hours=24)).count(),
+            'total_devices': Profile.objects.exclude(fcm_token__isnull=True).exclude(fcm_token__exact='').count(),
+            'total_families': Family.objects.count(),
+            'total_expenses': Expense.objects.count(),
+            'total_notes': Note.objects.count(),
+            'total_udhar': Udhar.objects.count(),
+            'db_size_bytes': db_size,
+            'db_size': format_size(db_size),
+            'recent_users': [
+                {**user, 'date_joined': user['date_joined'].isoformat()} for user in recent_users
+            ],
+        }
+
+def refresh_dashboard_stats():
+    snapshot, _ = StatsSnapshot.objects.update_or_create(
+        pk=SNAPSHOT_ID,
+        defaults={'data': compute_dashboard_stats(), 'updated_at': timezone.now()},
+    )
+    return snapshot
+
+
+def get_dashboard_stats():
+    """
+    The latest snapshot as a dict, with `updated_at` set to when it was taken.
+    Only computes the stats inline if no snapshot exists yet.
+    """
+    snapshot = StatsSnapshot.objects.filter(pk=SNAPSHOT_ID).first() or refresh_dashboard_stats()
+    stats = dict(snapshot.data)
+    stats['updated_at'] = snapshot.updated_at
+    stats['recent_users'] = [
+        {**user, 'date_joined': parse_datetime(user['date_joined'])} for user in stats.get('recent_users', [])
+    ]
+    return stats
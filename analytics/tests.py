@@ -0,0 +1,110 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import DailyMetric
+from .rollups import day_start, last_final_day, record_pushes_delivered, rollup_days
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.yesterday = self.today - timedelta(days=1)
+
+    def sign_up(self, username, day):
+        return User.objects.create_user(username, date_joined=day_start(day) + timedelta(hours=1))
+
+    def rollup(self, **options):
+        call_command('rollup_daily_metrics', stdout=StringIO(), **options)
+
+    def signups(self, day):
+        return DailyMetric.objects.get(date=day).signups
+
+    def test_finished_days_are_not_recomputed(self):
+        self.sign_up('alice', self.yesterday)
+        self.rollup(backfill_days=3)
+        self.assertEqual(self.signups(self.yesterday), 1)
+        self.assertEqual(last_final_day(), self.yesterday)
+
+        # e.g. a row backdated after the day was rolled up
+        self.sign_up('bob', self.yesterday)
+        self.rollup()
+        self.assertEqual(self.signups(self.yesterday), 1)
+
+        self.rollup(since=self.yesterday)
+        self.assertEqual(self.signups(self.yesterday), 2)
+
+    def test_today_is_not_final(self):
+        self.sign_up('alice', self.today)
+        self.rollup(backfill_days=1)
+        self.assertEqual(self.signups(self.today), 1)
+        self.assertIsNone(last_final_day())
+
+        self.sign_up('bob', self.today)
+        self.rollup()
+        self.assertEqual(self.signups(self.today), 2)
+
+    def test_pushes_delivered_are_counted_as_sent(self):
+        record_pushes_delivered(0)
+        self.assertFalse(DailyMetric.objects.exists())
+
+        record_pushes_delivered(3)
+        record_pushes_delivered(2)
+        self.assertEqual(DailyMetric.objects.get(date=self.today).pushes_delivered, 5)
+
+        # Rolling the day up (again) keeps them
+        rollup_days(self.today, self.today)
+        rollup_days(self.today, self.today)
+        self.assertEqual(DailyMetric.objects.get(date=self.today).pushes_delivered, 5)
+
+
+class DashboardViewTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw')
+        self.client.force_login(self.admin)
+        self.today = timezone.localdate()
+
+    def series(self, response):
+        return {series['key']: series for series in response.context['growth']['series']}
+
+    def test_growth_charts_come_from_the_rollups(self):
+        DailyMetric.objects.create(date=self.today - timedelta(days=3), signups=4, chat_messages=7)
+        DailyMetric.objects.create(date=self.today, signups=1, pushes_delivered=2)
+        # Outside the 30-day range
+        DailyMetric.objects.create(date=self.today - timedelta(days=40), signups=50)
+
+        response = self.client.get('/dashboard/', {'range': 30})
+        self.assertEqual(response.status_code, 200)
+        series = self.series(response)
+        self.assertEqual(series['signups']['total'], 5)
+        self.assertEqual(
+            [(bar['date'], bar['value'], bar['height']) for bar in series['signups']['bars'][-4:]],
+            [(self.today - timedelta(days=3), 4, 100),
+             (self.today - timedelta(days=2), 0, 0),
+             (self.today - timedelta(days=1), 0, 0),
+             (self.today, 1, 25)],
+        )
+        self.assertEqual(series['chat_messages']['total'], 7)
+        self.assertEqual(series['pushes_delivered']['total'], 2)
+
+        response = self.client.get('/dashboard/', {'range': 90})
+        self.assertEqual(self.series(response)['signups']['total'], 55)
+
+    def test_stats_are_read_from_the_snapshot(self):
+        self.assertEqual(self.client.get('/dashboard/').context['total_users'], 1)
+        User.objects.create_user('alice', 'alice@example.com', 'pw')
+        self.assertEqual(self.client.get('/dashboard/').context['total_users'], 1)
+
+        self.assertRedirects(self.client.post('/dashboard/refresh-stats/'), '/')
+        response = self.client.get('/dashboard/')
+        self.assertEqual(response.context['total_users'], 2)
+        self.assertEqual(response.context['recent_users'][0]['email'], 'alice@example.com')
+
+    def test_superusers_only(self):
+        self.client.force_login(User.objects.create_user('alice', 'alice@example.com', 'pw'))
+        self.assertEqual(self.client.get('/dashboard/').status_code, 302)
+        self.assertEqual(self.client.post('/dashboard/refresh-stats/').status_code, 302)
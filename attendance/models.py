@@ -6,6 +6,7 @@ class Attendance(models.Model):
     date = models.DateField()
     status = models.CharField(max_length=20)  # e.g., 'FULL-DAY', 'HALF-DAY'
     remark = models.TextField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('user', 'date')
@@ -0,0 +1,150 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from self_manager_backend.caches import bump_version, get_version
+from self_manager_backend.routers import read_replica
+from .models import Attendance
+
+# Working-day weight of each status; anything else counts as absent
+DAY_WEIGHTS = {
+    'FULL-DAY': Decimal('1'),
+    'HALF-DAY': Decimal('0.5'),
+}
+
+# Completed months and years only change when someone edits history, which invalidates
+# them through the user's shared reports version
+SUMMARY_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+
+# Heatmap day codes; 0 means no record and unknown statuses are numbered after these
+STATUS_CODES = {
+    'FULL-DAY': 1,
+    'HALF-DAY': 2,
+}
+
+
+def reports_version_key(user_id):
+    return f'attendance:reports:version:{user_id}'
+
+def summary_cache_key(user_id, version, year, month):
+    return f'attendance:summary:{user_id}:{version}:{year}-{month:02d}'
+
+def heatmap_cache_key(user_id, version, year):
+    return f'attendance:heatmap:{user_id}:{version}:{year}'
+
+def next_month(year, month):
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def monthly_counts(user, months):
+    """
+    Return {(year, month): {status: count}} for the given months.
+
+    Completed months are served from the cache; the rest come from one
+    grouped query over the (user, date) index for the span they cover.
+    """
+    today = timezone.localdate()
+    current = (today.year, today.month)
+    version = get_version(reports_version_key(user.pk))
+    keys = {month: summary_cache_key(user.pk, version, *month) for month in months}
+    cached = cache.get_many([keys[month] for month in months if month < current])
+
+    counts = {month: cached[keys[month]] for month in months if keys[month] in cached}
+    missing = [month for month in months if month not in counts]
+    if not missing:
+        return counts
+
+    start = date(*min(missing), 1)
+    end = date(*next_month(*max(missing)), 1)
+    rows = (
+        Attendance.objects
+        .filter(user=user, date__gte=start, date__lt=end)
+        .annotate(month=TruncMonth('date'))
+        .values('month', 'status')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    fetched = defaultdict(dict)
+    with read_replica(user):
+        for row in rows:
+            fetched[(row['month'].year, row['month'].month)][row['status']] = row['count']
+
+    to_cache = {}
+    for month in missing:
+        counts[month] = fetched.get(month, {})
+        if month < current:
+            to_cache[keys[month]] = counts[month]
+    if to_cache:
+        cache.set_many(to_cache, SUMMARY_CACHE_TIMEOUT)
+    return counts
+
+def working_days(counts):
+    return sum((DAY_WEIGHTS.get(status, 0) * count for status, count in counts.items()), Decimal('0'))
+
+
+def year_heatmap(user, year):
+    """
+    A year of attendance as run-length encoded day codes.
+
+    `runs` is a flat [code, length, code, length, ...] list covering every day
+    from January 1st, `legend[code]` is the status for a code (legend[0] is
+    "no record") and `remarks` maps day-of-year offsets to their remark.
+    Completed years are cached.
+    """
+    key = heatmap_cache_key(user.pk, get_version(reports_version_key(user.pk)), year)
+    if year < timezone.localdate().year:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    start = date(year, 1, 1)
+    days = (date(year + 1, 1, 1) - start).days
+    with read_replica(user):
+        rows = list(
+            Attendance.objects
+            .filter(user=user, date__gte=start, date__lt=start + timedelta(days=days))
+            .values_list('date', 'status', 'remark')
+        )
+
+    legend = [''] + sorted(STATUS_CODES, key=STATUS_CODES.get)
+    codes = dict(STATUS_CODES)
+    day_codes = [0] * days
+    remarks = {}
+    for attendance_date, status, remark in rows:
+        if status not in codes:
+            codes[status] = len(legend)
+            legend.append(status)
+        offset = (attendance_date - start).days
+        day_codes[offset] = codes[status]
+        if remark:
+            remarks[offset] = remark
+
+    runs = []
+    for code in day_codes:
+        if runs and runs[-2] == code:
+            runs[-1] += 1
+        else:
+            runs += [code, 1]
+
+    heatmap = {'year': year, 'legend': legend, 'runs': runs, 'remarks': remarks}
+    if year < timezone.localdate().year:
+        cache.set(key, heatmap, SUMMARY_CACHE_TIMEOUT)
+    return heatmap
+
+
+def invalidate_reports(user_id):
+    # Any change outdates all of the user's reports; edits to history are rare
+    bump_version(reports_version_key(user_id))
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def invalidate_on_change(sender, instance, **kwargs):
+    invalidate_reports(instance.user_id)
@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from rest_framework import serializers
 from .models import Attendance
 
@@ -7,3 +9,44 @@ class AttendanceSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'date', 'status', 'remark']
         read_only_fields = ['id', 'user']
 
+class AttendanceEntrySerializer(serializers.Serializer):
+    date = serializers.DateField()
+    status = serializers.CharField(max_length=20)
+    remark = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+class AttendanceBulkSerializer(serializers.Serializer):
+    """
+    Either `entries` (a list of {date, status, remark}) or a date range
+    (`start_date`, `end_date`, `status`, optional `remark`) applied to every day.
+    """
+    MAX_DAYS = 366
+
+    entries = AttendanceEntrySerializer(many=True, required=False)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    status = serializers.CharField(max_length=20, required=False)
+    remark = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+    def validate(self, attrs):
+        entries = attrs.get('entries')
+        if entries is None:
+            start, end, status = attrs.get('start_date'), attrs.get('end_date'), attrs.get('status')
+            if not (start and end and status):
+                raise serializers.ValidationError("Provide either entries, or start_date, end_date and status.")
+            if end < start:
+                raise serializers.ValidationError({"end_date": "end_date must not be before start_date."})
+            entries = []
+            for offset in range((end - start).days + 1):
+                entry = {'date': start + timedelta(days=offset), 'status': status}
+                if 'remark' in attrs:
+                    entry['remark'] = attrs['remark']
+                entries.append(entry)
+
+        if not entries:
+            raise serializers.ValidationError({"entries": "At least one entry is required."})
+
+        # Last entry wins when a date is repeated
+        by_date = {entry['date']: entry for entry in entries}
+        if len(by_date) > self.MAX_DAYS:
+            raise serializers.ValidationError(f"At most {self.MAX_DAYS} days can be written at once.")
+        return {'entries': sorted(by_date.values(), key=lambda entry: entry['date'])}
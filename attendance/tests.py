@@ -1,3 +1,77 @@
+from datetime import date
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from self_manager_backend.caches import shared_cache
+from .models import Attendance
+from .reports import invalidate_reports, reports_version_key
+
+
+class SummaryValidationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('alice', 'alice@example.com', 'pw'))
+
+    def test_out_of_range_input_is_rejected(self):
+        for params in (
+            {'year': 0},
+            {'year': 10000},
+            {'year': 9999, 'month': 12},
+            {'year': 2026, 'month': 13},
+            {'daily_rate': 'Infinity'},
+            {'daily_rate': 'NaN'},
+            {'daily_rate': '1e30'},
+            {'daily_rate': 'abc'},
+        ):
+            with self.subTest(**params):
+                self.assertEqual(self.client.get('/api/attendance/summary/', params).status_code, 400)
+
+    def test_valid_input(self):
+        response = self.client.get('/api/attendance/summary/', {'year': 9998, 'month': 12, 'daily_rate': '850.50'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['pay'], 0)
+
+
+class SummaryCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.day = date(timezone.localdate().year - 1, 3, 10)
+        Attendance.objects.create(user=self.user, date=self.day, status='FULL-DAY')
+
+    def counts(self):
+        params = {'year': self.day.year, 'month': self.day.month}
+        return self.client.get('/api/attendance/summary/', params).json()['months'][0]['counts']
+
+    def test_invalidation_reaches_every_worker(self):
+        self.assertEqual(self.counts(), {'FULL-DAY': 1})
+
+        # A write path that skips the model signals invalidates explicitly, as bulk() does.
+        # Only the shared version changes; this process's cached entry is left in place.
+        Attendance.objects.filter(user=self.user).update(status='HALF-DAY')
+        invalidate_reports(self.user.pk)
+        self.assertEqual(self.counts(), {'HALF-DAY': 1})
+
+    def test_version_is_shared(self):
+        self.assertEqual(self.counts(), {'FULL-DAY': 1})
+        Attendance.objects.filter(user=self.user).update(status='HALF-DAY')
+        self.assertEqual(self.counts(), {'FULL-DAY': 1})
+
+        # What another worker's invalidation leaves behind
+        shared_cache.incr(reports_version_key(self.user.pk))
+        self.assertEqual(self.counts(), {'HALF-DAY': 1})
+
+    def test_heatmap_follows_the_shared_version(self):
+        def runs():
+            return self.client.get('/api/attendance/heatmap/', {'year': self.day.year}).json()['runs']
+
+        before = runs()
+        Attendance.objects.filter(user=self.user).update(status='HALF-DAY')
+        self.assertEqual(runs(), before)
 
-# Create your tests here.
+        shared_cache.incr(reports_version_key(self.user.pk))
+        self.assertNotEqual(runs(), before)
@@ -1,8 +1,20 @@
-from rest_framework import viewsets, permissions
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from self_manager_backend.mixins import ConditionalListMixin
+from sync.tracking import record_changes
 from .models import Attendance
-from .serializers import AttendanceSerializer
+from .reports import invalidate_reports, monthly_counts, next_month, working_days, year_heatmap
+from .serializers import AttendanceSerializer, AttendanceBulkSerializer
+
+MAX_DAILY_RATE = Decimal('1e12')
 
-class AttendanceViewSet(viewsets.ModelViewSet):
+class AttendanceViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     serializer_class = AttendanceSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -12,3 +24,113 @@ class AttendanceViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Upsert many days in one transaction. Existing (user, date) rows are
+        updated in place; remarks are only overwritten when supplied.
+        """
+        serializer = AttendanceBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        entries = serializer.validated_data['entries']
+        dates = [entry['date'] for entry in entries]
+        user = request.user
+
+        with transaction.atomic():
+            existing = set(Attendance.objects.filter(user=user, date__in=dates).values_list('date', flat=True))
+
+            with_remark = [Attendance(user=user, **entry) for entry in entries if 'remark' in entry]
+            without_remark = [Attendance(user=user, **entry) for entry in entries if 'remark' not in entry]
+            for objs, update_fields in (
+                (with_remark, ['status', 'remark', 'updated_at']),
+                (without_remark, ['status', 'updated_at']),
+            ):
+                if objs:
+                    Attendance.objects.bulk_create(
+                        objs,
+                        update_conflicts=True,
+                        unique_fields=['user', 'date'],
+                        update_fields=update_fields,
+                    )
+
+            # bulk_create skips post_save, so record the sync changes here
+            rows = list(Attendance.objects.filter(user=user, date__in=dates).order_by('date'))
+            record_changes(rows)
+            invalidate_reports(user.pk)
+
+        return Response({
+            'created': len(dates) - len(existing),
+            'updated': len(existing),
+            'results': [
+                {
+                    'id': row.id,
+                    'date': row.date,
+                    'status': row.status,
+                    'action': 'updated' if row.date in existing else 'created',
+                }
+                for row in rows
+            ],
+        })
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """
+        Per-month counts by status and working days (FULL-DAY = 1, HALF-DAY = 0.5)
+        for ?year=YYYY, or a single month with &month=M. With ?daily_rate=<amount>
+        (or settings.ATTENDANCE_DAILY_RATE) each month also carries its pay.
+        """
+        today = timezone.localdate()
+        try:
+            year = int(request.query_params.get('year', today.year))
+            month = request.query_params.get('month')
+            months = [(year, int(month))] if month else [(year, m) for m in range(1, 13)]
+            # The last month's next_month() has to be a valid date too
+            if not 1 <= year <= 9998 or not all(1 <= m <= 12 for _, m in months):
+                raise ValueError
+        except ValueError:
+            return Response({'detail': 'Invalid year or month.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        daily_rate = request.query_params.get('daily_rate', getattr(settings, 'ATTENDANCE_DAILY_RATE', None))
+        if daily_rate is not None:
+            try:
+                daily_rate = Decimal(str(daily_rate))
+                # NaN/Infinity can't be quantized or sent as JSON, and a year of pay
+                # at the cap still fits the decimal context's precision
+                if not daily_rate.is_finite() or abs(daily_rate) >= MAX_DAILY_RATE:
+                    raise InvalidOperation
+            except InvalidOperation:
+                return Response({'detail': 'Invalid daily_rate.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        counts = monthly_counts(request.user, months)
+        results = []
+        total_days = Decimal('0')
+        for year_month in months:
+            days = working_days(counts[year_month])
+            total_days += days
+            entry = {
+                'year': year_month[0],
+                'month': year_month[1],
+                'counts': counts[year_month],
+                'working_days': days,
+                'completed': next_month(*year_month) <= (today.year, today.month),
+            }
+            if daily_rate is not None:
+                entry['pay'] = (days * daily_rate).quantize(Decimal('0.01'))
+            results.append(entry)
+
+        data = {'months': results, 'working_days': total_days}
+        if daily_rate is not None:
+            data['daily_rate'] = daily_rate
+            data['pay'] = (total_days * daily_rate).quantize(Decimal('0.01'))
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def heatmap(self, request):
+        """Compact run-length encoded year of attendance for the calendar heatmap (?year=YYYY)."""
+        try:
+            year = int(request.query_params.get('year', timezone.localdate().year))
+            if not 1 <= year <= 9998:
+                raise ValueError
+        except ValueError:
+            return Response({'detail': 'Invalid year.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(year_heatmap(request.user, year))
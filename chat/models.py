@@ -8,6 +8,7 @@ class Message(models.Model):
     content = models.TextField(blank=True)
     image = models.ImageField(upload_to='chat_images/', blank=True, null=True)
     timestamp = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     # Simple message type distinction (text vs image vs system)
     MESSAGE_TYPES = (
@@ -0,0 +1,38 @@
+from taskqueue.registry import task
+from users.models import Profile
+from users.notification_manager import NotificationManager
+from .models import Message
+
+
+@task(max_attempts=1)
+def notify_chat_message(message_id):
+    """Push a new chat message to the other members of its family."""
+    message = Message.objects.select_related('sender', 'family').filter(pk=message_id).first()
+    if message is None:
+        return
+
+    family = message.family
+    user = message.sender
+    tokens = list(
+        Profile.objects
+        .filter(user__in=family.members.exclude(id=user.id))
+        .exclude(fcm_token__isnull=True).exclude(fcm_token__exact='')
+        .values_list('fcm_token', flat=True)
+    )
+    if not tokens:
+        return
+
+    sender_name = user.first_name if user.first_name else user.username
+    body = message.content if message.content else "Sent an image"
+
+    NotificationManager.send_multicast_notification(
+        tokens=tokens,
+        title=f"{sender_name} in {family.name}",
+        body=body,
+        data={
+            "type": "chat_message",
+            "family_id": str(family.id),
+            "message_id": str(message.id),
+            "sender_id": str(user.id)
+        }
+    )
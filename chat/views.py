@@ -1,11 +1,12 @@
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
 from .models import Message, MessageReadStatus
 from .serializers import MessageSerializer
 from families.models import Family
-from users.notification_manager import NotificationManager
+from .tasks import notify_chat_message
 from django.db.models import Q
 from users.models import Profile
 
@@ -38,38 +39,12 @@ class MessageListCreateView(generics.ListCreateAPIView):
         user = self.request.user
 
         if user not in family.members.all():
-            raise permissions.PermissionDenied("You are not a member of this family.")
+            raise PermissionDenied("You are not a member of this family.")
 
         message = serializer.save(sender=user, family=family)
 
         # --- Send Notifications ---
-        # Get all other members
-        other_members = family.members.exclude(id=user.id)
-        
-        # Collect tokens
-        tokens = []
-        for member in other_members:
-            try:
-                if hasattr(member, 'profile') and member.profile.fcm_token:
-                    tokens.append(member.profile.fcm_token)
-            except Exception:
-                pass
-
-        if tokens:
-            sender_name = user.first_name if user.first_name else user.username
-            body = message.content if message.content else "Sent an image"
-            
-            NotificationManager.send_multicast_notification(
-                tokens=tokens,
-                title=f"{sender_name} in {family.name}",
-                body=body,
-                data={
-                    "type": "chat_message",
-                    "family_id": str(family.id),
-                    "message_id": str(message.id),
-                    "sender_id": str(user.id)
-                }
-            )
+        notify_chat_message.enqueue(message.id)
 
 class MarkReadView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -111,20 +86,20 @@ class MessageDetailView(generics.RetrieveUpdateDestroyAPIView):
     def perform_update(self, serializer):
         message = self.get_object()
         if message.sender != self.request.user:
-            raise permissions.PermissionDenied("You can only edit your own messages.")
+            raise PermissionDenied("You can only edit your own messages.")
         
         if message.is_deleted:
-             raise permissions.PermissionDenied("Cannot edit a deleted message.")
+             raise PermissionDenied("Cannot edit a deleted message.")
         
         # Check editing window (15 minutes)
         if timezone.now() - message.timestamp > timedelta(minutes=15):
-             raise permissions.PermissionDenied("You can only edit messages within 15 minutes of sending.")
+             raise PermissionDenied("You can only edit messages within 15 minutes of sending.")
              
         serializer.save(is_edited=True)
 
     def perform_destroy(self, instance):
         if instance.sender != self.request.user:
-             raise permissions.PermissionDenied("You can only delete your own messages.")
+             raise PermissionDenied("You can only delete your own messages.")
         
         # Hard delete
         instance.delete()
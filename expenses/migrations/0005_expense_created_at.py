@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-19 18:02
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models.functions import Cast
+
+
+def backfill_created_at(apps, schema_editor):
+    # Existing rows have no creation time; the expense date is the best estimate
+    Expense = apps.get_model('expenses', 'Expense')
+    Expense.objects.update(created_at=Cast('date', models.DateTimeField()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0004_expense_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_created_at, migrations.RunPython.noop),
+    ]
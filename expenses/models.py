@@ -11,6 +11,8 @@ class Expense(models.Model):
     uuid = models.CharField(max_length=100, unique=True, null=True, blank=True)
     items = models.JSONField(default=list, blank=True)
     image = models.ImageField(upload_to='expenses/', null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-date']
@@ -0,0 +1,39 @@
+from taskqueue.registry import task
+from users.models import Profile
+from users.notification_manager import NotificationManager
+from .models import Expense
+
+
+@task(max_attempts=1)
+def notify_new_expense(expense_id):
+    """Push a 'New Expense Added' notification to the creator's family members."""
+    expense = Expense.objects.select_related('user', 'family').filter(pk=expense_id).first()
+    if expense is None or expense.family is None:
+        return
+
+    # Get all members of the family except the creator
+    tokens = list(
+        Profile.objects
+        .filter(user__in=expense.family.members.exclude(id=expense.user_id))
+        .exclude(fcm_token__isnull=True).exclude(fcm_token__exact='')
+        .values_list('fcm_token', flat=True)
+    )
+    if not tokens:
+        return
+
+    user = expense.user
+    name_display = user.first_name if user.first_name else user.username
+    body = f"{name_display} added an expense of ₹{expense.amount}"
+    if expense.items:
+        body += f" for {expense.items}"
+
+    NotificationManager.send_multicast_notification(
+        tokens=tokens,
+        title="New Expense Added",
+        body=body,
+        data={
+            "type": "new_expense",
+            "expense_id": str(expense.id),
+            "family_id": str(expense.family_id)
+        }
+    )
@@ -1,8 +1,10 @@
 from rest_framework import viewsets, permissions
+from self_manager_backend.mixins import ConditionalListMixin
 from .models import Expense
 from .serializers import ExpenseSerializer
+from .tasks import notify_new_expense
 
-class ExpenseViewSet(viewsets.ModelViewSet):
+class ExpenseViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     serializer_class = ExpenseSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -17,33 +19,5 @@ class ExpenseViewSet(viewsets.ModelViewSet):
         instance = serializer.save(user=user, family=family)
 
         if family:
-            try:
-                # Get all members of the family except the creator
-                members = family.members.exclude(id=user.id)
-                
-                tokens = []
-                for member in members:
-                    if hasattr(member, 'profile') and member.profile.fcm_token:
-                        tokens.append(member.profile.fcm_token)
-                
-                if tokens:
-                    from users.notification_manager import NotificationManager
-                    title = "New Expense Added"
-                    name_display = user.first_name if user.first_name else user.username
-                    body = f"{name_display} added an expense of ₹{instance.amount}"
-                    if instance.items:
-                        body += f" for {instance.items}"
-                    
-                    NotificationManager.send_multicast_notification(
-                        tokens=tokens,
-                        title=title,
-                        body=body,
-                        data={
-                            "type": "new_expense",
-                            "expense_id": str(instance.id),
-                            "family_id": str(family.id)
-                        }
-                    )
-            except Exception as e:
-                print(f"Error sending notification: {e}")
+            notify_new_expense.enqueue(instance.id)
 
@@ -0,0 +1,76 @@
+"""
+Family code allocation.
+
+Codes are derived from the family's primary key through a keyed Feistel
+permutation of the 6-character code space, so every id maps to a distinct,
+non-sequential code without any lookups and concurrent creates can never
+collide. Codes handed out before this scheme were random and may occupy a
+derived code; those rare clashes fall through to a second, disjoint index.
+"""
+import hashlib
+import string
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+ALPHABET = string.ascii_uppercase + string.digits
+CODE_LENGTH = 6
+CODE_SPACE = len(ALPHABET) ** CODE_LENGTH
+
+FEISTEL_ROUNDS = 4
+HALF_BITS = 16
+HALF_MASK = (1 << HALF_BITS) - 1
+
+# Index = pk + attempt * ATTEMPT_STRIDE keeps every attempt's indexes disjoint
+MAX_ATTEMPTS = 2
+ATTEMPT_STRIDE = CODE_SPACE // MAX_ATTEMPTS
+
+
+def _permutation_key():
+    return hashlib.sha256(settings.FAMILY_CODE_KEY.encode()).digest()
+
+def _feistel(value, key):
+    left, right = value >> HALF_BITS, value & HALF_MASK
+    for round_index in range(FEISTEL_ROUNDS):
+        digest = hashlib.blake2b(f'{round_index}:{right}'.encode(), key=key, digest_size=2).digest()
+        left, right = right, left ^ int.from_bytes(digest, 'big')
+    return (left << HALF_BITS) | right
+
+def permute(index):
+    """Bijection of [0, CODE_SPACE) onto itself (a 32-bit Feistel network with cycle walking)."""
+    if not 0 <= index < CODE_SPACE:
+        raise ValueError(f"Index {index} is outside the family code space.")
+    key = _permutation_key()
+    value = _feistel(index, key)
+    while value >= CODE_SPACE:
+        value = _feistel(value, key)
+    return value
+
+def encode(value):
+    chars = []
+    for _ in range(CODE_LENGTH):
+        value, digit = divmod(value, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+def family_code_for(family_id, attempt=0):
+    if family_id >= ATTEMPT_STRIDE:
+        raise ValueError("Family id is beyond the range the code space can address.")
+    return encode(permute(family_id + attempt * ATTEMPT_STRIDE))
+
+
+def assign_family_code(family):
+    """Store the derived code on a freshly created family and return it."""
+    from .models import Family
+
+    for attempt in range(MAX_ATTEMPTS):
+        code = family_code_for(family.pk, attempt)
+        try:
+            with transaction.atomic():
+                Family.objects.filter(pk=family.pk).update(family_code=code)
+        except IntegrityError:
+            # Taken by a legacy random code
+            continue
+        family.family_code = code
+        return code
+    raise IntegrityError(f"Could not allocate a family code for family {family.pk}.")
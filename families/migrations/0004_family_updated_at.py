@@ -0,0 +1,20 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('families', '0003_family_allow_join_via_link_joinrequest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='family',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
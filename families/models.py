@@ -1,12 +1,53 @@
 from django.db import models
+from django.db.models import Count, Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.conf import settings
 
+def _count_subquery(queryset, field='family'):
+    """Correlated COUNT(*) of `queryset` grouped on `field`, usable as an annotation."""
+    counts = queryset.order_by().values(field).annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(counts), 0)
+
+class FamilyQuerySet(models.QuerySet):
+    def for_user(self, user):
+        """Families the user owns or belongs to, without an OR-join + DISTINCT."""
+        member_of = FamilyMember.objects.filter(user=user).values('family_id')
+        return self.filter(models.Q(owner=user) | models.Q(pk__in=member_of))
+
+    def with_summary(self, user):
+        """
+        Annotate what the family list shows (member and pending request counts,
+        the last chat message and the user's unread count) as correlated
+        subqueries, so the whole list is a single query.
+        """
+        from chat.models import Message, MessageReadStatus
+
+        messages = Message.objects.filter(family=OuterRef('pk'))
+        last_message = messages.order_by('-timestamp', '-id')
+        read_by_user = MessageReadStatus.objects.filter(message=OuterRef('pk'), user=user)
+        unread = messages.exclude(sender=user).filter(~Exists(read_by_user))
+
+        return self.select_related('owner').annotate(
+            member_count=_count_subquery(FamilyMember.objects.filter(family=OuterRef('pk'))),
+            pending_request_count=_count_subquery(JoinRequest.objects.filter(family=OuterRef('pk'), status='pending')),
+            unread_count=_count_subquery(unread),
+            last_message_id=Subquery(last_message.values('id')[:1]),
+            last_message_content=Subquery(last_message.values('content')[:1]),
+            last_message_type=Subquery(last_message.values('message_type')[:1]),
+            last_message_timestamp=Subquery(last_message.values('timestamp')[:1]),
+            last_message_is_deleted=Subquery(last_message.values('is_deleted')[:1]),
+            last_message_sender=Subquery(last_message.values('sender__username')[:1]),
+        )
+
 class Family(models.Model):
     name = models.CharField(max_length=255)
     family_code = models.CharField(max_length=12, unique=True, null=True, blank=True)
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='owned_families')
     members = models.ManyToManyField(settings.AUTH_USER_MODEL, through='FamilyMember', related_name='families')
     allow_join_via_link = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = FamilyQuerySet.as_manager()
 
     def __str__(self):
         return self.name
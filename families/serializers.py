@@ -9,6 +9,39 @@ class FamilySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'family_code', 'owner', 'owner_username', 'members', 'allow_join_via_link']
         read_only_fields = ['id', 'owner', 'family_code', 'owner_username']
 
+class FamilyListSerializer(serializers.ModelSerializer):
+    """List representation built from FamilyQuerySet.with_summary() annotations; no member ids."""
+    owner_username = serializers.ReadOnlyField(source='owner.username')
+    member_count = serializers.IntegerField(read_only=True)
+    pending_request_count = serializers.SerializerMethodField()
+    unread_count = serializers.IntegerField(read_only=True)
+    last_message = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Family
+        fields = ['id', 'name', 'family_code', 'owner', 'owner_username', 'allow_join_via_link',
+                  'member_count', 'pending_request_count', 'unread_count', 'last_message']
+        read_only_fields = fields
+
+    def get_pending_request_count(self, obj):
+        # Only the owner handles join requests
+        request = self.context.get('request')
+        if request and obj.owner_id == request.user.id:
+            return obj.pending_request_count
+        return 0
+
+    def get_last_message(self, obj):
+        if obj.last_message_id is None:
+            return None
+        return {
+            'id': obj.last_message_id,
+            'content': obj.last_message_content,
+            'message_type': obj.last_message_type,
+            'timestamp': serializers.DateTimeField().to_representation(obj.last_message_timestamp),
+            'is_deleted': obj.last_message_is_deleted,
+            'sender_username': obj.last_message_sender,
+        }
+
 class FamilyMemberSerializer(serializers.ModelSerializer):
     username = serializers.ReadOnlyField(source='user.username')
     first_name = serializers.ReadOnlyField(source='user.first_name')
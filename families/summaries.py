@@ -0,0 +1,69 @@
+"""
+Cached family summaries for code lookups (FamilyViewSet.by_code).
+
+Invite codes are shared in group chats and looked up many times, so the
+small public summary is cached per code and outdated whenever the family,
+its settings (e.g. allow_join_via_link) or its membership change, through a
+per-code version shared by every worker.
+"""
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from self_manager_backend.caches import bump_version, get_version
+from .models import Family, FamilyMember
+
+FAMILY_SUMMARY_TIMEOUT = 60 * 10
+
+
+def family_summary_version_key(code):
+    return f'family:code:version:{code.upper()}'
+
+def family_summary_key(code, version):
+    return f'family:code:{code.upper()}:{version}'
+
+def get_family_summary(code):
+    """Return the summary dict for a family code, or None if no family uses it."""
+    key = family_summary_key(code, get_version(family_summary_version_key(code)))
+    summary = cache.get(key)
+    if summary is not None:
+        return summary
+
+    family = (
+        Family.objects
+        .filter(family_code=code.upper())
+        .select_related('owner')
+        .annotate(member_count=Count('familymember'))
+        .first()
+    )
+    if family is None:
+        return None
+    summary = {
+        'id': family.id,
+        'name': family.name,
+        'family_code': family.family_code,
+        'owner': family.owner_id,
+        'owner_username': family.owner.username,
+        'member_count': family.member_count,
+        'allow_join_via_link': family.allow_join_via_link,
+    }
+    cache.set(key, summary, FAMILY_SUMMARY_TIMEOUT)
+    return summary
+
+
+def invalidate_family_summary(family_id=None, code=None):
+    if code is None:
+        code = Family.objects.filter(pk=family_id).values_list('family_code', flat=True).first()
+    if code:
+        bump_version(family_summary_version_key(code))
+
+@receiver(post_save, sender=Family)
+@receiver(post_delete, sender=Family)
+def invalidate_on_family_change(sender, instance, **kwargs):
+    invalidate_family_summary(code=instance.family_code)
+
+@receiver(post_save, sender=FamilyMember)
+@receiver(post_delete, sender=FamilyMember)
+def invalidate_on_membership_change(sender, instance, **kwargs):
+    invalidate_family_summary(family_id=instance.family_id)
@@ -1,3 +1,75 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from chat.models import Message, MessageReadStatus
+from self_manager_backend.caches import shared_cache
+from .codes import assign_family_code
+from .models import Family, FamilyMember, JoinRequest
+from .summaries import family_summary_version_key
+
+
+class HandleRequestsTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'pw')
+        self.family = Family.objects.create(name='Home', owner=self.owner)
+        assign_family_code(self.family)
+        FamilyMember.objects.create(family=self.family, user=self.owner)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def member_count(self):
+        return self.client.get('/api/families/by_code/', {'code': self.family.family_code}).json()['member_count']
+
+    def test_approving_updates_the_code_lookup(self):
+        self.assertEqual(self.member_count(), 1)
+
+        join_request = JoinRequest.objects.create(
+            family=self.family, user=User.objects.create_user('joiner'), status='pending')
+        response = self.client.post(
+            f'/api/families/{self.family.pk}/handle_requests/', {'request_ids': [join_request.pk], 'approve': True},
+            format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.member_count(), 2)
+
+    def test_code_lookup_follows_the_shared_version(self):
+        self.assertEqual(self.member_count(), 1)
+        FamilyMember.objects.bulk_create([FamilyMember(family=self.family, user=User.objects.create_user('joiner'))])
+        self.assertEqual(self.member_count(), 1)
+
+        # What another worker's invalidation leaves behind
+        shared_cache.incr(family_summary_version_key(self.family.family_code))
+        self.assertEqual(self.member_count(), 2)
+
+
+class FamilyListValidatorTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'pw')
+        self.family = Family.objects.create(name='Home', owner=self.owner)
+        FamilyMember.objects.create(family=self.family, user=self.owner)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self.etag = self.client.get('/api/families/')['ETag']
+
+    def assertListChanged(self):
+        response = self.client.get('/api/families/', HTTP_IF_NONE_MATCH=self.etag)
+        self.assertEqual(response.status_code, 200)
+        self.etag = response['ETag']
+
+    def test_unchanged_list_is_not_modified(self):
+        self.assertEqual(self.client.get('/api/families/', HTTP_IF_NONE_MATCH=self.etag).status_code, 304)
+
+    def test_chat_and_membership_change_the_validators(self):
+        member = FamilyMember.objects.create(family=self.family, user=User.objects.create_user('member'))
+        self.assertListChanged()
+
+        message = Message.objects.create(family=self.family, sender=member.user, content='Hi')
+        self.assertListChanged()
+        MessageReadStatus.objects.create(message=message, user=self.owner)
+        self.assertListChanged()
+        message.is_deleted = True
+        message.save()
+        self.assertListChanged()
+
+        member.delete()
+        self.assertListChanged()
@@ -1,32 +1,81 @@
-from django.db import models
-from django.http import HttpResponse
+import hashlib
+from functools import lru_cache
+
+from django.db import models, transaction
+from django.shortcuts import render
+from django.template.loader import get_template
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from rest_framework import viewsets, permissions
+from self_manager_backend.mixins import ConditionalListMixin
+from .codes import assign_family_code
 from .models import Family, FamilyMember, JoinRequest
-from .serializers import FamilySerializer, FamilyMemberSerializer, JoinRequestSerializer
+from .summaries import get_family_summary, invalidate_family_summary
+from .serializers import FamilySerializer, FamilyListSerializer, FamilyMemberSerializer, JoinRequestSerializer
 
-import random
-import string
 from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework import status
+from sync.models import Change
+from sync.tracking import record_membership
+from users.bootstrap import invalidate_bootstrap, invalidate_family_bootstrap
+
+class JoinRequestPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
 
-def generate_family_code():
-    while True:
-        code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-        if not Family.objects.filter(family_code=code).exists():
-            return code
+# Upper bound on request ids handled by one handle_requests call
+MAX_BULK_JOIN_REQUESTS = 500
 
-class FamilyViewSet(viewsets.ModelViewSet):
+class FamilyViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     serializer_class = FamilySerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Family.objects.filter(models.Q(owner=self.request.user) | models.Q(members=self.request.user)).distinct()
+        queryset = Family.objects.for_user(self.request.user)
+        if self.action == 'list':
+            queryset = queryset.with_summary(self.request.user)
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return FamilyListSerializer
+        return FamilySerializer
+
+    def get_list_validators(self, queryset):
+        from chat.models import Message, MessageReadStatus
+
+        last_modified, tokens = super().get_list_validators(queryset)
+        # The list summarises members, join requests and chat, so those must move the validators too.
+        # Families have few members and pending requests, so counting those (which catches leaves
+        # and handled requests) is cheap. Chat is only ever appended to and soft-deleted messages
+        # are saved, so the newest updated_at / id is enough there without counting every row.
+        family_ids = queryset.values('pk')
+        aggregates = [
+            FamilyMember.objects.filter(family__in=family_ids).aggregate(
+                last=models.Max('joined_at'), token=models.Count('pk')),
+            JoinRequest.objects.filter(family__in=family_ids, status='pending').aggregate(
+                last=models.Max('created_at'), token=models.Count('pk')),
+            Message.objects.filter(family__in=family_ids).aggregate(
+                last=models.Max('updated_at'), token=models.Max('pk')),
+            MessageReadStatus.objects.filter(user=self.request.user, message__family__in=family_ids).aggregate(
+                last=models.Max('read_at'), token=models.Max('pk')),
+        ]
+        for aggregate in aggregates:
+            if aggregate['last'] and (last_modified is None or aggregate['last'] > last_modified):
+                last_modified = aggregate['last']
+            tokens.append(aggregate['token'])
+        return last_modified, tokens
 
     def perform_create(self, serializer):
-        family = serializer.save(owner=self.request.user, family_code=generate_family_code())
-        # Automatically add owner as a member
-        FamilyMember.objects.create(family=family, user=self.request.user)
+        with transaction.atomic():
+            family = serializer.save(owner=self.request.user)
+            # The code is derived from the new pk, so it cannot race another create
+            assign_family_code(family)
+            # Automatically add owner as a member
+            FamilyMember.objects.create(family=family, user=self.request.user)
 
     def perform_update(self, serializer):
         if serializer.instance.owner != self.request.user:
@@ -79,8 +128,15 @@ class FamilyViewSet(viewsets.ModelViewSet):
         if family.owner != request.user:
             return Response({'detail': 'Only the owner can view pending requests.'}, status=status.HTTP_403_FORBIDDEN)
         
-        requests = JoinRequest.objects.filter(family=family, status='pending')
-        return Response(JoinRequestSerializer(requests, many=True).data)
+        requests = (
+            JoinRequest.objects
+            .filter(family=family, status='pending')
+            .select_related('user', 'family')
+            .order_by('created_at', 'id')
+        )
+        paginator = JoinRequestPagination()
+        page = paginator.paginate_queryset(requests, request, view=self)
+        return paginator.get_paginated_response(JoinRequestSerializer(page, many=True).data)
 
     @action(detail=True, methods=['post'])
     def handle_request(self, request, pk=None):
@@ -108,16 +164,63 @@ class FamilyViewSet(viewsets.ModelViewSet):
         except JoinRequest.DoesNotExist:
             return Response({'detail': 'Join request not found.'}, status=status.HTTP_404_NOT_FOUND)
 
+    @action(detail=True, methods=['post'])
+    def handle_requests(self, request, pk=None):
+        """Approve or reject many pending join requests (`request_ids`, `approve`) in one transaction."""
+        family = self.get_object()
+        if family.owner != request.user:
+            return Response({'detail': 'Only the owner can handle requests.'}, status=status.HTTP_403_FORBIDDEN)
+
+        request_ids = request.data.get('request_ids')
+        approve = request.data.get('approve')
+        if not isinstance(request_ids, list) or not request_ids or approve is None:
+            return Response({'detail': 'request_ids (a non-empty list) and approve are required.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(request_ids) > MAX_BULK_JOIN_REQUESTS:
+            return Response({'detail': f'At most {MAX_BULK_JOIN_REQUESTS} requests can be handled at once.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            request_ids = {int(request_id) for request_id in request_ids}
+        except (TypeError, ValueError):
+            return Response({'detail': 'request_ids must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        new_status = 'accepted' if approve else 'rejected'
+        with transaction.atomic():
+            join_requests = list(
+                JoinRequest.objects
+                .select_for_update()
+                .filter(family=family, status='pending', id__in=request_ids)
+                .only('id', 'user_id')
+            )
+            handled_ids = [join_req.id for join_req in join_requests]
+            if approve:
+                FamilyMember.objects.bulk_create(
+                    [FamilyMember(family=family, user_id=join_req.user_id) for join_req in join_requests],
+                    ignore_conflicts=True,
+                )
+                # bulk_create skips the sync receiver that hands joiners the family's rows
+                record_membership(family.id, [join_req.user_id for join_req in join_requests], Change.UPSERT)
+            JoinRequest.objects.filter(id__in=handled_ids).update(status=new_status)
+
+        # Bulk writes skip the signals that normally drop cached bootstrap payloads
+        # and the code lookup summary (its member count)
+        invalidate_family_bootstrap(family.id)
+        invalidate_bootstrap(join_req.user_id for join_req in join_requests)
+        invalidate_family_summary(code=family.family_code)
+
+        return Response({
+            'status': new_status,
+            'processed': sorted(handled_ids),
+            'not_found': sorted(request_ids - set(handled_ids)),
+        })
+
     @action(detail=False, methods=['get'])
     def by_code(self, request):
         code = request.query_params.get('code')
         if not code:
             return Response({'detail': 'Code is required'}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            family = Family.objects.get(family_code=code.upper())
-            return Response(FamilySerializer(family).data)
-        except Family.DoesNotExist:
+        summary = get_family_summary(code)
+        if summary is None:
             return Response({'detail': 'Family not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(summary)
 
     @action(detail=True, methods=['post'])
     def transfer_ownership(self, request, pk=None):
@@ -159,67 +262,21 @@ class FamilyMemberViewSet(viewsets.ModelViewSet):
         return Response({'detail': 'Permission denied.'}, status=status.HTTP_403_FORBIDDEN)
 
 
+INVITE_PAGE_MAX_AGE = 60 * 60
+
+@lru_cache(maxsize=1)
+def _invite_template_digest():
+    return hashlib.md5(get_template('family_invite.html').template.source.encode()).hexdigest()
+
+def _invite_etag(request, code):
+    return hashlib.md5(f'{_invite_template_digest()}:{code}'.encode()).hexdigest()
+
+@cache_control(public=True, max_age=INVITE_PAGE_MAX_AGE)
+@condition(etag_func=_invite_etag)
 def invite_bridge(request, code):
     # This view will be accessed via a browser from a shared link
     # It renders a simple HTML page that redirects to the app scheme
-    app_url = f"selfmanager://join/{code}"
-    
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Joining Family...</title>
-        <meta name="viewport" content="width=device-width, initial-scale=1">
-        <style>
-            body {{ 
-                font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif; 
-                display: flex; 
-                flex-direction: column; 
-                align-items: center; 
-                justify-content: center; 
-                height: 100vh; 
-                margin: 0; 
-                background: #f8fafc; 
-            }}
-            .card {{ 
-                background: white; 
-                padding: 2.5rem; 
-                border-radius: 1.5rem; 
-                box-shadow: 0 10px 25px -5px rgba(0, 0, 0, 0.1), 0 8px 10px -6px rgba(0, 0, 0, 0.1); 
-                text-align: center; 
-                max-width: 400px; 
-                width: 90%;
-            }}
-            h2 {{ color: #1e293b; margin-top: 0; font-size: 1.5rem; }}
-            p {{ color: #64748b; line-height: 1.6; margin-bottom: 2rem; }}
-            .btn {{ 
-                display: inline-block; 
-                background: #6366f1; 
-                color: white; 
-                padding: 0.875rem 1.5rem; 
-                border-radius: 0.75rem; 
-                text-decoration: none; 
-                font-weight: 600;
-                transition: background 0.2s;
-            }}
-            .btn:active {{ background: #4f46e5; }}
-            .footer {{ margin-top: 2rem; font-size: 0.875rem; color: #94a3b8; }}
-        </style>
-    </head>
-    <body>
-        <div class="card">
-            <h2>Self Manager</h2>
-            <p>We're opening the app so you can join the family. If nothing happens, tap the button below.</p>
-            <a href="{app_url}" class="btn">Open Self Manager</a>
-            <div class="footer">Family Code: <strong>{code}</strong></div>
-        </div>
-        <script>
-            // Attempt to open the app automatically
-            setTimeout(function() {{
-                window.location.href = "{app_url}";
-            }}, 500);
-        </script>
-    </body>
-    </html>
-    """
-    return HttpResponse(html_content)
+    return render(request, 'family_invite.html', {
+        'app_url': f"selfmanager://join/{code}",
+        'code': code,
+    })
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-19 17:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_alter_note_options_note_color_id_note_is_pinned_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['user', '-is_pinned', '-updated_at', '-id'], name='note_user_pinned_updated_idx'),
+        ),
+    ]
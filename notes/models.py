@@ -12,6 +12,10 @@ class Note(models.Model):
 
     class Meta:
         ordering = ['-is_pinned', '-updated_at']
+        indexes = [
+            # Backs the per-user list ordering and the preview keyset cursor
+            models.Index(fields=['user', '-is_pinned', '-updated_at', '-id'], name='note_user_pinned_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title or 'Untitled'} ({self.user.username})"
@@ -6,3 +6,12 @@ class NoteSerializer(serializers.ModelSerializer):
         model = Note
         fields = ['id', 'user', 'title', 'content', 'color_id', 'is_pinned', 'created_at', 'updated_at']
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+
+class NotePreviewSerializer(serializers.ModelSerializer):
+    # `preview` is annotated by the queryset (truncated in the DB), `content` is never loaded
+    preview = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = Note
+        fields = ['id', 'title', 'preview', 'color_id', 'is_pinned', 'updated_at']
+        read_only_fields = fields
@@ -1,3 +1,26 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .models import Note
+
+
+class ConditionalListTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.older = Note.objects.create(user=self.user, title='Older')
+        Note.objects.create(user=self.user, title='Newer')
+
+    def test_unchanged_list_is_not_modified(self):
+        etag = self.client.get('/api/notes/')['ETag']
+        self.assertEqual(self.client.get('/api/notes/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_delete_changes_the_validators(self):
+        response = self.client.get('/api/notes/')
+        self.assertNotIn('Last-Modified', response)
+        self.older.delete()
+
+        response = self.client.get('/api/notes/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
@@ -1,8 +1,15 @@
+from django.db.models.functions import Substr
 from rest_framework import viewsets, permissions
+from rest_framework.decorators import action
+from self_manager_backend.mixins import ConditionalListMixin
 from .models import Note
-from .serializers import NoteSerializer
+from .pagination import NoteCursorPagination
+from .serializers import NoteSerializer, NotePreviewSerializer
 
-class NoteViewSet(viewsets.ModelViewSet):
+# Characters of `content` returned by the previews list
+NOTE_PREVIEW_LENGTH = 140
+
+class NoteViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     serializer_class = NoteSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -12,3 +19,17 @@ class NoteViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @action(detail=False, methods=['get'])
+    def previews(self, request):
+        """
+        Lightweight list for the notes screen: title plus a truncated preview,
+        cursor-paginated. Full content is only served by the detail endpoint.
+        """
+        queryset = (
+            self.get_queryset()
+            .only('id', 'title', 'color_id', 'is_pinned', 'updated_at')
+            .annotate(preview=Substr('content', 1, NOTE_PREVIEW_LENGTH))
+        )
+        paginator = NoteCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        return paginator.get_paginated_response(NotePreviewSerializer(page, many=True).data)
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class SelfManagerBackendConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'self_manager_backend'
+    verbose_name = 'Self Manager Backend'
+
+    def ready(self):
+        from . import db  # noqa: F401  (connects the SQLite pragma hook)
+        from .performance import install_serializer_timing
+        install_serializer_timing()
@@ -0,0 +1,364 @@
+"""
+Endpoint benchmarks against a seed_perf_data dataset.
+
+Every API endpoint is called through the test client as a real user
+(JWT auth included) for a number of iterations. Each one reports p50/p95/p99
+latency, query count, response size and status code. Caches are cleared
+before every request, so each one is measured cold. Requests that write run
+in a transaction whose constraints are checked and which is then rolled
+back, so every iteration sees the same data and a write that would fail at
+commit still fails here.
+
+The benchmark test in tests.py seeds the dataset described in the
+checked-in baseline and fails when an endpoint goes over its budget:
+
+- p95 latency above LATENCY_TOLERANCE x the baseline + LATENCY_SLACK_MS
+- more queries than the baseline
+- a response more than BYTES_TOLERANCE x the baseline's size
+- a different status code
+
+A baseline entry may carry a "budget" with explicit p95_ms / queries /
+bytes limits that replace the derived ones. Re-record the baseline (see
+tests.py) on the machine that enforces it, after intended changes.
+"""
+import json
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from attendance.models import Attendance
+from chat.models import Message
+from expenses.models import Expense
+from families.models import Family, FamilyMember, JoinRequest
+from notes.models import Note
+from self_manager_backend.caches import SHARED_CACHE_ALIAS
+from self_manager_backend.management.commands.seed_perf_data import USERNAME_PREFIX
+from udhar.models import Udhar
+from users.authentication import VersionedRefreshToken
+from users.export import build_export_file
+from users.models import DataExport, OTPRequest
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'benchmark_baseline.json'
+
+LATENCY_TOLERANCE = 2.0
+LATENCY_SLACK_MS = 20
+BYTES_TOLERANCE = 1.2
+
+PASSWORD = 'Bench@mark1'
+OTP = '1234567'
+REGISTER_EMAIL = 'bench-register@example.com'
+VERIFY_EMAIL = 'bench-verify@example.com'
+
+# (method, URL name, fixture names for the URL args, query string / body or a
+# callable building it from the fixtures)
+ENDPOINTS = [
+    ('GET', 'api-root', (), None),
+    ('POST', 'token_obtain_pair', (), lambda f: {'username': f['user'].username, 'password': PASSWORD}),
+    ('POST', 'token_refresh', (), lambda f: {'refresh': f['refresh']}),
+    ('POST', 'auth_register', (), {
+        'username': 'bench_register', 'email': REGISTER_EMAIL, 'password': PASSWORD,
+        'first_name': 'Bench', 'last_name': 'User', 'otp': OTP,
+    }),
+    ('POST', 'auth_google_login', (), lambda f: {'email': f['user'].email}),
+    ('POST', 'auth_send_otp', (), {'email': 'bench-otp@example.com'}),
+    ('POST', 'auth_verify_otp', (), {'email': VERIFY_EMAIL, 'otp': OTP}),
+    ('POST', 'auth_reset_password', (), lambda f: {'email': f['user'].email, 'otp': OTP, 'new_password': PASSWORD}),
+    ('POST', 'update_fcm_token', (), {'fcm_token': 'benchmark-token'}),
+    ('DELETE', 'delete_account', (), None),
+    ('GET', 'user_me', (), None),
+    ('PATCH', 'user_me', (), {'first_name': 'Bench'}),
+    ('GET', 'data_export', (), None),
+    ('GET', 'data_export_detail', ('export',), None),
+    ('GET', 'data_export_download', ('export',), None),
+    ('GET', 'bootstrap', (), None),
+    ('GET', 'sync', (), {'since': 0}),
+    ('GET', 'message-list-create', ('family',), None),
+    ('POST', 'message-list-create', ('family',), {'content': 'Benchmark message'}),
+    ('POST', 'mark-messages-read', ('family',), None),
+    ('GET', 'message-detail', ('message',), None),
+    ('PATCH', 'message-detail', ('message',), {'content': 'Edited'}),
+    ('DELETE', 'message-detail', ('message',), None),
+    ('GET', 'attendance-list', (), None),
+    ('POST', 'attendance-list', (), lambda f: {'date': f['tomorrow'], 'status': 'FULL-DAY'}),
+    ('GET', 'attendance-detail', ('attendance',), None),
+    ('PATCH', 'attendance-detail', ('attendance',), {'status': 'HALF-DAY'}),
+    ('DELETE', 'attendance-detail', ('attendance',), None),
+    ('POST', 'attendance-bulk', (), lambda f: {
+        'start_date': f['tomorrow'], 'end_date': f['tomorrow'] + timedelta(days=30), 'status': 'FULL-DAY'}),
+    ('GET', 'attendance-summary', (), None),
+    ('GET', 'attendance-heatmap', (), None),
+    ('GET', 'notes-list', (), None),
+    ('POST', 'notes-list', (), {'title': 'Benchmark', 'content': 'Benchmark note'}),
+    ('GET', 'notes-detail', ('note',), None),
+    ('PATCH', 'notes-detail', ('note',), {'is_pinned': True}),
+    ('DELETE', 'notes-detail', ('note',), None),
+    ('GET', 'notes-previews', (), None),
+    ('GET', 'families-list', (), None),
+    ('POST', 'families-list', (), {'name': 'Benchmark family'}),
+    ('GET', 'families-detail', ('family',), None),
+    ('PATCH', 'families-detail', ('family',), {'name': 'Renamed family'}),
+    ('DELETE', 'families-detail', ('family',), None),
+    ('GET', 'families-members', ('family',), None),
+    ('POST', 'families-join', (), lambda f: {'family_code': f['other_family'].family_code}),
+    ('GET', 'families-pending-requests', ('family',), None),
+    ('POST', 'families-handle-request', ('family',), lambda f: {'request_id': f['join_request'], 'approve': True}),
+    ('POST', 'families-handle-requests', ('family',), lambda f: {'request_ids': [f['join_request']], 'approve': True}),
+    ('GET', 'families-by-code', (), lambda f: {'code': f['other_family'].family_code}),
+    ('POST', 'families-transfer-ownership', ('family',), lambda f: {'new_owner_id': f['member_user']}),
+    ('GET', 'family-members-list', (), None),
+    ('GET', 'family-members-detail', ('family_member',), None),
+    ('DELETE', 'family-members-detail', ('family_member',), None),
+    ('GET', 'expenses-list', (), None),
+    ('POST', 'expenses-list', (), lambda f: {
+        'amount': '250.00', 'category': 'Groceries', 'date': f['today'],
+        'items': [{'name': 'Milk', 'quantity': 2, 'price': 60}, {'name': 'Rice', 'quantity': 1, 'price': 130}]}),
+    ('GET', 'expenses-detail', ('expense',), None),
+    ('PATCH', 'expenses-detail', ('expense',), {'description': 'Edited'}),
+    ('DELETE', 'expenses-detail', ('expense',), None),
+    ('GET', 'udhar-list', (), None),
+    ('POST', 'udhar-list', (), lambda f: {
+        'person_name': 'Bench Mark', 'amount': '5000.00', 'date': f['today'], 'type': 'GIVE'}),
+    ('GET', 'udhar-detail', ('udhar',), None),
+    ('PATCH', 'udhar-detail', ('udhar',), {'reason': 'Edited'}),
+    ('DELETE', 'udhar-detail', ('udhar',), None),
+    ('POST', 'udhar-add-repayment', ('udhar',), lambda f: {'amount': '100.00', 'date': f['now']}),
+    ('POST', 'udhar-close-udhar', ('udhar',), None),
+]
+
+
+def label(method, name):
+    return f'{method} {name}'
+
+# Endpoints called as another fixture user than the family owner: an owner
+# can't delete their account
+ACTING_USER = {
+    label('DELETE', 'delete_account'): 'deletable_user',
+}
+
+def api_url_names(patterns=None, prefix=''):
+    """Names of every URL pattern under api/."""
+    names = set()
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            names |= api_url_names(pattern.url_patterns, route)
+        elif isinstance(pattern, URLPattern) and pattern.name and route.lstrip('^').startswith('api/'):
+            names.add(pattern.name)
+    return names
+
+
+def prepare_fixtures():
+    """
+    Pick the benchmark user (the owner of the busiest seeded family) and
+    create the rows the detail and write endpoints need. Safe to call repeatedly.
+    """
+    family = (
+        Family.objects.filter(owner__username__startswith=USERNAME_PREFIX)
+        .annotate(message_count=Count('messages'))
+        .order_by('-message_count', 'pk')
+        .first()
+    )
+    if family is None:
+        raise ValueError("No seeded data found; run seed_perf_data first.")
+    user = family.owner
+    if not user.check_password(PASSWORD):
+        user.set_password(PASSWORD)
+        user.save(update_fields=['password'])
+
+    member = FamilyMember.objects.filter(family=family).exclude(user=user).order_by('pk').first()
+    outsider = (
+        User.objects.filter(username__startswith=USERNAME_PREFIX, familymember__isnull=True)
+        .order_by('pk').first()
+    )
+    deletable_user = (
+        User.objects.filter(username__startswith=USERNAME_PREFIX, owned_families__isnull=True, profile__isnull=False)
+        .order_by('pk').first()
+    )
+    join_request, _ = JoinRequest.objects.get_or_create(family=family, user=outsider, defaults={'status': 'pending'})
+    export = DataExport.objects.filter(user=user, status='ready').exclude(file='').order_by('pk').first()
+    if export is None:
+        export = build_export_file(DataExport.objects.create(user=user).pk)
+    for email in (REGISTER_EMAIL, user.email):
+        OTPRequest.objects.create(email=email, otp=OTP, is_verified=True)
+    OTPRequest.objects.create(email=VERIFY_EMAIL, otp=OTP)
+
+    now = timezone.now()
+    today = timezone.localdate(now)
+    # Light users may have none of these; the detail endpoints need one of each
+    if not Attendance.objects.filter(user=user).exists():
+        Attendance.objects.create(user=user, date=today - timedelta(days=1), status='FULL-DAY')
+    if not Note.objects.filter(user=user).exists():
+        Note.objects.create(user=user, title='Benchmark', content='Benchmark note')
+    if not Expense.objects.filter(family=family).exists():
+        Expense.objects.create(user=user, family=family, amount='250.00', category='Groceries', date=today)
+    if not Udhar.objects.filter(user=user).exists():
+        Udhar.objects.create(user=user, person_name='Bench Mark', amount='5000.00', date=today, type='GIVE')
+    # Messages can only be edited for 15 minutes after sending
+    message = (
+        Message.objects.filter(family=family, sender=user, is_deleted=False, timestamp__gte=now - timedelta(minutes=10))
+        .order_by('-pk').first()
+        or Message.objects.create(family=family, sender=user, content='Benchmark message')
+    )
+
+    return {
+        'user': user,
+        'deletable_user': deletable_user,
+        'refresh': str(VersionedRefreshToken.for_user(user)),
+        'family': family.pk,
+        'other_family': Family.objects.exclude(pk=family.pk).exclude(family_code=None).order_by('pk').first(),
+        'member_user': member.user_id if member else user.pk,
+        'family_member': member.pk if member else None,
+        'join_request': join_request.pk,
+        'export': export.pk,
+        'message': message.pk,
+        'attendance': Attendance.objects.filter(user=user).values_list('pk', flat=True).first(),
+        'note': Note.objects.filter(user=user).values_list('pk', flat=True).first(),
+        'expense': Expense.objects.filter(family=family).values_list('pk', flat=True).first(),
+        'udhar': Udhar.objects.filter(user=user).values_list('pk', flat=True).first(),
+        'now': now,
+        'today': today,
+        'tomorrow': today + timedelta(days=1),
+    }
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    index = max(0, -(-pct * len(ordered) // 100) - 1)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+class QueryCounter:
+    # CaptureQueriesContext stops counting once the 9000-query log is full
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+def request_once(client, method, path, data):
+    for alias in settings.CACHES:
+        # The shared cache holds long-lived version counters, not cached responses
+        if alias != SHARED_CACHE_ALIAS:
+            caches[alias].clear()
+    queries = QueryCounter()
+    with connection.execute_wrapper(queries):
+        started = time.perf_counter()
+        if method == 'GET':
+            response = client.get(path, data)
+        else:
+            response = getattr(client, method.lower())(path, data, format='json')
+        if response.streaming:
+            size = sum(len(chunk) for chunk in response.streaming_content)
+        else:
+            size = len(response.content)
+        elapsed = time.perf_counter() - started
+    return elapsed, queries.count, size, response.status_code
+
+
+def run_benchmarks(fixtures, iterations=20, warmup=2, only=None):
+    """Benchmark ENDPOINTS; returns {label: {p50_ms, p95_ms, p99_ms, queries, bytes, status}}."""
+    clients = {}
+    def client_for(user):
+        if user.pk not in clients:
+            clients[user.pk] = APIClient()
+            clients[user.pk].credentials(HTTP_AUTHORIZATION=f"Bearer {VersionedRefreshToken.for_user(user).access_token}")
+        return clients[user.pk]
+
+    results = {}
+    for method, name, args, data in ENDPOINTS:
+        key = label(method, name)
+        if only and only not in key:
+            continue
+        client = client_for(fixtures[ACTING_USER.get(key, 'user')])
+        path = reverse(name, args=[fixtures[arg] for arg in args])
+        if callable(data):
+            data = data(fixtures)
+
+        timings, queries, size, status = [], 0, 0, None
+        for iteration in range(warmup + iterations):
+            if method == 'GET':
+                elapsed, queries, size, status = request_once(client, method, path, data)
+            else:
+                with transaction.atomic():
+                    elapsed, queries, size, status = request_once(client, method, path, data)
+                    try:
+                        # Deferred FK constraints are only checked at commit,
+                        # which the rollback below would skip
+                        connection.check_constraints()
+                    except IntegrityError as exc:
+                        raise IntegrityError(f"{key} would fail at commit: {exc}") from exc
+                    transaction.set_rollback(True)
+            if iteration >= warmup:
+                timings.append(elapsed * 1000)
+
+        results[key] = {
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'p99_ms': round(percentile(timings, 99), 2),
+            'queries': queries,
+            'bytes': size,
+            'status': status,
+        }
+    return results
+
+
+def check_budgets(results, baseline):
+    """Human-readable descriptions of every endpoint over its budget."""
+    failures = []
+    for key, result in results.items():
+        entry = baseline['endpoints'].get(key)
+        if entry is None:
+            failures.append(f"{key}: not in the baseline, re-record it")
+            continue
+        budget = entry.get('budget', {})
+        limits = {
+            'p95_ms': budget.get('p95_ms', entry['p95_ms'] * LATENCY_TOLERANCE + LATENCY_SLACK_MS),
+            'queries': budget.get('queries', entry['queries']),
+            'bytes': budget.get('bytes', entry['bytes'] * BYTES_TOLERANCE),
+        }
+        for metric, limit in limits.items():
+            if result[metric] > limit:
+                failures.append(f"{key}: {metric} {result[metric]} over budget {limit:g} (baseline {entry[metric]})")
+        if result['status'] != entry['status']:
+            failures.append(f"{key}: status {result['status']}, baseline {entry['status']}")
+    return failures
+
+
+def load_baseline(path=BASELINE_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+def write_baseline(results, dataset, iterations, path=BASELINE_PATH):
+    """Save `results` as the baseline, keeping any hand-set budgets."""
+    try:
+        previous = load_baseline(path)['endpoints']
+    except FileNotFoundError:
+        previous = {}
+    endpoints = {}
+    for key, result in results.items():
+        endpoints[key] = dict(result)
+        if 'budget' in previous.get(key, {}):
+            endpoints[key]['budget'] = previous[key]['budget']
+    with open(path, 'w') as f:
+        json.dump({'dataset': dataset, 'iterations': iterations, 'endpoints': endpoints}, f, indent=2)
+        f.write('\n')
+
+
+def format_results(results):
+    lines = [f"{'endpoint':<42}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'bytes':>10}{'status':>8}"]
+    for key, r in results.items():
+        lines.append(
+            f"{key:<42}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+            f"{r['queries']:>9}{r['bytes']:>10}{r['status']:>8}")
+    return '\n'.join(lines)
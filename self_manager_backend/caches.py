@@ -0,0 +1,40 @@
+"""
+Cache versions shared by every worker process.
+
+The default cache is a per-process LocMemCache, so deleting an entry only
+reaches the worker that handled the write. Entries that must not be served
+stale by other workers are kept in the default cache under a key that
+carries a version number, and the version lives in CACHES['shared']
+(database backed). Invalidating bumps the version, and the other workers'
+entries become unreachable. The bump is written in the same transaction as
+the change that caused it.
+"""
+import time
+
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+
+SHARED_CACHE_ALIAS = 'shared'
+
+shared_cache = ConnectionProxy(caches, SHARED_CACHE_ALIAS)
+
+
+def get_versions(keys):
+    """{key: version} for the version counters `keys`, starting any that don't exist."""
+    versions = shared_cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # First use, or culled: any fresh value leaves older entries unreachable
+            shared_cache.add(key, time.time_ns(), None)
+            versions[key] = shared_cache.get(key)
+    return versions
+
+def get_version(key):
+    return get_versions([key])[key]
+
+def bump_version(key):
+    try:
+        shared_cache.incr(key)
+    except ValueError:
+        # Not started, so no entry uses it; the next read starts a fresh one
+        pass
@@ -0,0 +1,24 @@
+"""
+Per-connection database tuning.
+
+SQLite connections get the pragmas in settings.SQLITE_PRAGMAS as soon as
+they are opened. WAL lets readers proceed while a write is in progress and
+the busy timeout makes a blocked writer wait for the lock instead of
+failing straight away with "database is locked".
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def apply_sqlite_pragmas(cursor, pragmas):
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_sqlite_pragmas(cursor, settings.SQLITE_PRAGMAS)
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment
+
+from self_manager_backend.benchmarks import (
+    check_budgets,
+    format_results,
+    load_baseline,
+    prepare_fixtures,
+    run_benchmarks,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every API endpoint against the current database, which must have been "
+        "filled by seed_perf_data (e.g. a full-scale dataset). Writes are rolled back, but "
+        "the fixtures the benchmark needs (a password, OTPs, a join request) are kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2,
+                            help="Unmeasured requests per endpoint before timing.")
+        parser.add_argument('--only', default=None,
+                            help="Only endpoints whose 'METHOD url-name' contains this text.")
+        parser.add_argument('--compare', metavar='BASELINE', default=None,
+                            help="Fail if any endpoint is over the budgets derived from this baseline file.")
+
+    def handle(self, *args, **options):
+        # Lets the test client through ALLOWED_HOSTS and keeps email in memory
+        setup_test_environment()
+        try:
+            fixtures = prepare_fixtures()
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        results = run_benchmarks(fixtures, options['iterations'], options['warmup'], options['only'])
+        self.stdout.write(format_results(results))
+
+        if options['compare']:
+            failures = check_budgets(results, load_baseline(options['compare']))
+            if failures:
+                raise CommandError("Endpoints over budget:\n" + '\n'.join(failures))
+            self.stdout.write(self.style.SUCCESS("All endpoints within budget."))
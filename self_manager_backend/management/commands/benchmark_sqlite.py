@@ -0,0 +1,128 @@
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from self_manager_backend.db import apply_sqlite_pragmas
+
+# What SQLite does without the hook: rollback journal, full fsync, and
+# Python's default 5 s busy handler
+BASELINE_PRAGMAS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+}
+
+SCHEMA = """
+CREATE TABLE message (
+    id INTEGER PRIMARY KEY,
+    family_id INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    timestamp REAL NOT NULL
+);
+CREATE INDEX message_family_ts ON message (family_id, timestamp);
+"""
+FAMILIES = 50
+
+
+def connect(path, pragmas):
+    conn = sqlite3.connect(path, timeout=5.0, isolation_level=None)
+    apply_sqlite_pragmas(conn.cursor(), pragmas)
+    return conn
+
+def run_client(path, pragmas, role, seed, duration):
+    """
+    One process hammering the database for `duration` seconds.
+    Writers post a chat message per transaction; readers fetch a page of a
+    family's latest messages. Returns (operations, locked_errors).
+    """
+    conn = connect(path, pragmas)
+    cursor = conn.cursor()
+    ops = errors = 0
+    family = seed % FAMILIES
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        family = (family + 7) % FAMILIES
+        try:
+            if role == 'write':
+                cursor.execute('BEGIN IMMEDIATE')
+                cursor.execute(
+                    'INSERT INTO message (family_id, content, timestamp) VALUES (?, ?, ?)',
+                    (family, 'x' * 120, time.time()),
+                )
+                cursor.execute('COMMIT')
+            else:
+                cursor.execute(
+                    'SELECT id, content FROM message WHERE family_id = ? ORDER BY timestamp DESC LIMIT 50',
+                    (family,),
+                ).fetchall()
+            ops += 1
+        except sqlite3.OperationalError:
+            errors += 1
+            if conn.in_transaction:
+                cursor.execute('ROLLBACK')
+    conn.close()
+    return role, ops, errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrent read/write benchmark comparing SQLite's default journal settings "
+        "with settings.SQLITE_PRAGMAS. Runs against a scratch database file, never the real one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=5.0,
+                            help="Seconds per configuration.")
+        parser.add_argument('--rows', type=int, default=20000,
+                            help="Messages seeded before the run.")
+
+    def handle(self, *args, **options):
+        configs = [('default', BASELINE_PRAGMAS), ('tuned', settings.SQLITE_PRAGMAS)]
+        self.stdout.write(
+            f"{options['writers']} writer(s), {options['readers']} reader(s), "
+            f"{options['duration']:.0f}s per configuration\n")
+        self.stdout.write(f"{'config':<10}{'writes/s':>12}{'reads/s':>12}{'locked':>10}")
+
+        for label, pragmas in configs:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = str(Path(tmp) / 'bench.sqlite3')
+                self.seed(path, pragmas, options['rows'])
+                totals = self.run(path, pragmas, options)
+            self.stdout.write(
+                f"{label:<10}"
+                f"{totals['write'] / options['duration']:>12.0f}"
+                f"{totals['read'] / options['duration']:>12.0f}"
+                f"{totals['errors']:>10}"
+            )
+
+    def seed(self, path, pragmas, rows):
+        conn = connect(path, pragmas)
+        conn.executescript(SCHEMA)
+        now = time.time()
+        conn.execute('BEGIN')
+        conn.executemany(
+            'INSERT INTO message (family_id, content, timestamp) VALUES (?, ?, ?)',
+            ((i % FAMILIES, 'x' * 120, now - i) for i in range(rows)),
+        )
+        conn.execute('COMMIT')
+        conn.close()
+
+    def run(self, path, pragmas, options):
+        roles = ['write'] * options['writers'] + ['read'] * options['readers']
+        totals = {'write': 0, 'read': 0, 'errors': 0}
+        with ProcessPoolExecutor(max_workers=len(roles)) as pool:
+            futures = [
+                pool.submit(run_client, path, pragmas, role, seed, options['duration'])
+                for seed, role in enumerate(roles)
+            ]
+            for future in futures:
+                role, ops, errors = future.result()
+                totals[role] += ops
+                totals['errors'] += errors
+        return totals
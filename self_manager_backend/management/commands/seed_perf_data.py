@@ -0,0 +1,427 @@
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from attendance.models import Attendance
+from chat.models import Message, MessageReadStatus
+from expenses.models import Expense
+from families.codes import family_code_for
+from families.models import Family, FamilyMember
+from notes.models import Note
+from sync.tracking import record_changes
+from udhar.models import Repayment, Udhar
+from users.models import Profile
+
+# Seeded accounts are recognisable by their username
+USERNAME_PREFIX = 'perf_'
+
+# Volumes at --scale 1 (about 4,000 users and 6M rows over two years)
+FAMILIES = 1000
+MEMBERS_PER_FAMILY = (2, 6)
+SOLO_USER_SHARE = 0.1           # users that are not in any family
+MESSAGES_PER_FAMILY = 1000      # mean; activity varies a lot between families
+REPLY_SHARE = 0.05
+REPLY_WINDOW = 200               # replies point at one of the last REPLY_WINDOW messages
+UNREAD_PER_MEMBER = 8           # mean number of trailing messages a member hasn't read
+EXPENSES_PER_USER_DAY = 0.5
+FAMILY_EXPENSE_SHARE = 0.7      # expenses of family members that are shared with the family
+UDHARS_PER_USER = 6
+ATTENDANCE_SHARE = 0.6          # users that track attendance
+NOTES_PER_USER = 12
+
+WORDS = (
+    'the milk bill paid school fees rent market vegetables tomorrow call mama remind '
+    'pick up kids doctor appointment grocery list rice dal oil sugar atta salary bank '
+    'transfer electricity water gas recharge meeting office trip train ticket book '
+    'return friday monday weekend birthday gift cake party guests cook dinner lunch '
+    'medicine repair plumber car service insurance premium due note idea plan budget'
+).split()
+FIRST_NAMES = ('Aarav', 'Vivaan', 'Aditya', 'Ananya', 'Diya', 'Ishaan', 'Kavya', 'Meera',
+               'Neha', 'Priya', 'Rahul', 'Rohan', 'Sanjay', 'Sneha', 'Tanvi', 'Vikram')
+LAST_NAMES = ('Sharma', 'Verma', 'Gurjar', 'Patel', 'Singh', 'Yadav', 'Reddy', 'Nair',
+              'Mehta', 'Joshi', 'Gupta', 'Iyer')
+CATEGORIES = ('Food', 'Groceries', 'Transport', 'Bills', 'Shopping', 'Health',
+              'Education', 'Entertainment', 'Rent', 'Other')
+ITEMS = {
+    'Food': ('Thali', 'Chai', 'Samosa', 'Pizza', 'Biryani'),
+    'Groceries': ('Milk', 'Rice', 'Atta', 'Dal', 'Oil', 'Vegetables', 'Fruits', 'Eggs'),
+    'Transport': ('Petrol', 'Auto', 'Metro card', 'Parking'),
+    'Bills': ('Electricity', 'Water', 'Mobile recharge', 'Internet', 'Gas cylinder'),
+    'Shopping': ('Shirt', 'Shoes', 'Bedsheet', 'Utensils'),
+    'Health': ('Medicines', 'Consultation', 'Lab test'),
+    'Education': ('Books', 'School fees', 'Stationery'),
+    'Entertainment': ('Movie', 'Streaming', 'Outing'),
+    'Rent': ('Rent',),
+    'Other': ('Gift', 'Donation', 'Repair'),
+}
+NOTE_COLORS = ('default', 'red', 'orange', 'yellow', 'green', 'teal', 'blue', 'purple')
+
+
+@contextmanager
+def explicit_timestamps(models):
+    """
+    Turn off auto_now/auto_now_add on `models` for the block, so bulk_create
+    keeps the historical timestamps set on the objects instead of "now".
+    """
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Batch:
+    """Collects unsaved objects of one model and bulk_creates them `size` at a time."""
+
+    def __init__(self, model, size, on_flush=None):
+        self.model = model
+        self.size = size
+        self.on_flush = on_flush
+        self.pending = []
+        self.created = 0
+
+    def add(self, obj):
+        self.pending.append(obj)
+        if len(self.pending) >= self.size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        objs = self.model.objects.bulk_create(self.pending, batch_size=self.size)
+        self.pending = []
+        self.created += len(objs)
+        if self.on_flush:
+            self.on_flush(objs)
+
+
+def money(rng, low, high, step=1):
+    """A Decimal amount between low and high rupees, rounded to `step`."""
+    return Decimal(round(rng.uniform(low, high) / step) * step).quantize(Decimal('0.01'))
+
+def text(rng, words):
+    return ' '.join(rng.choices(WORDS, k=max(1, words)))
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a large synthetic dataset for benchmarking: families "
+        "with chat history and read receipts, years of expenses, udhars with repayments, "
+        "attendance streaks and notes. Output is deterministic for a given --seed and day. "
+        "Meant for a dedicated database, e.g. DATABASE_URL=sqlite:///perf.sqlite3."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help="Multiplies the number of families and users (1 = about 4,000 users).")
+        parser.add_argument('--activity', type=float, default=1.0,
+                            help="Multiplies per-user and per-family volumes (messages, expenses, notes...).")
+        parser.add_argument('--days', type=int, default=730,
+                            help="Length of the generated history.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Rows per bulk_create.")
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith=USERNAME_PREFIX).exists():
+            raise CommandError(
+                f"The database already contains seeded users ({USERNAME_PREFIX}*). "
+                "Seed a fresh database instead.")
+        if options['scale'] <= 0 or options['activity'] <= 0 or options['days'] < 1:
+            raise CommandError("--scale, --activity and --days must be positive.")
+
+        self.rng = random.Random(options['seed'])
+        self.activity = options['activity']
+        self.batch_size = options['batch_size']
+        # History ends at midnight so reruns on the same day produce the same rows
+        self.now = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.start = self.now - timedelta(days=options['days'])
+        self.started = time.monotonic()
+
+        with explicit_timestamps([User, FamilyMember, Family, Message, MessageReadStatus,
+                                  Expense, Udhar, Repayment, Attendance, Note]):
+            users = self.seed_users(options['scale'])
+            family_of = self.seed_families(users, options['scale'])
+            self.seed_messages()
+            self.seed_personal_data(users, family_of)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded in {time.monotonic() - self.started:.0f}s. "
+            "Run rollup_daily_metrics --since <start date> and refresh_dashboard_stats to update analytics."))
+
+    def report(self, label, count):
+        self.stdout.write(f"{label:<28}{count:>12,}   ({time.monotonic() - self.started:.0f}s)")
+
+    def random_time(self, after, before=None):
+        before = before or self.now
+        if after >= before:
+            return before
+        return after + timedelta(seconds=self.rng.uniform(0, (before - after).total_seconds()))
+
+    def count(self, mean):
+        """A skewed (exponential) count around `mean`, scaled by --activity."""
+        return int(self.rng.expovariate(1 / (mean * self.activity)))
+
+    def seed_users(self, scale):
+        rng = self.rng
+        families = max(1, round(FAMILIES * scale))
+        total = round(families * sum(MEMBERS_PER_FAMILY) / 2 / (1 - SOLO_USER_SHARE))
+        # Seeded accounts can't log in with a password (and skip the slow hashing)
+        password = UNUSABLE_PASSWORD_PREFIX + 'seeded'
+
+        created = []
+        users = Batch(User, self.batch_size, on_flush=created.extend)
+        for i in range(total):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            # Most accounts exist from early on, some joined recently
+            joined = self.random_time(self.start, self.start + (self.now - self.start) * rng.choice((0.5, 0.5, 1)))
+            # Roughly 20% active today and half within the last week
+            roll = rng.random()
+            if roll < 0.2:
+                last_login = self.random_time(max(joined, self.now - timedelta(days=1)))
+            elif roll < 0.5:
+                last_login = self.random_time(max(joined, self.now - timedelta(days=7)))
+            else:
+                last_login = self.random_time(joined)
+            users.add(User(
+                username=f'{USERNAME_PREFIX}{i:07d}', email=f'{USERNAME_PREFIX}{i:07d}@example.com',
+                first_name=first, last_name=last, password=password,
+                date_joined=joined, last_login=last_login,
+            ))
+        users.flush()
+        self.report('users', users.created)
+
+        # bulk_create skips the post_save signal that normally creates profiles
+        profiles = Batch(Profile, self.batch_size)
+        for user in created:
+            token = uuid.UUID(int=rng.getrandbits(128)).hex * 3 if rng.random() < 0.7 else None
+            profiles.add(Profile(user_id=user.pk, fcm_token=token))
+        profiles.flush()
+        return created
+
+    def seed_families(self, users, scale):
+        rng = self.rng
+        families_total = max(1, round(FAMILIES * scale))
+        pool = users[:]
+        rng.shuffle(pool)
+
+        groups = []
+        for _ in range(families_total):
+            size = rng.randint(*MEMBERS_PER_FAMILY)
+            if len(pool) < size:
+                break
+            groups.append([pool.pop() for _ in range(size)])
+
+        families = []
+        for group in groups:
+            owner = min(group, key=lambda user: user.date_joined)
+            families.append(Family(
+                name=f'{owner.last_name} family', owner_id=owner.pk,
+                updated_at=self.random_time(owner.date_joined)))
+        created = []
+        batch = Batch(Family, self.batch_size, on_flush=created.extend)
+        for family in families:
+            batch.add(family)
+        batch.flush()
+        for family in created:
+            family.family_code = family_code_for(family.pk)
+        Family.objects.bulk_update(created, ['family_code'], batch_size=self.batch_size)
+        self.report('families', len(created))
+
+        family_of = {}
+        self.family_members = {}
+        members = Batch(FamilyMember, self.batch_size)
+        for family, group in zip(created, groups):
+            owner_joined = min(user.date_joined for user in group)
+            self.family_members[family.pk] = []
+            for user in group:
+                joined_at = max(owner_joined, user.date_joined)
+                members.add(FamilyMember(family_id=family.pk, user_id=user.pk, joined_at=joined_at))
+                self.family_members[family.pk].append((user.pk, joined_at))
+                family_of[user.pk] = family.pk
+        members.flush()
+        self.report('family members', members.created)
+        return family_of
+
+    def seed_messages(self):
+        rng = self.rng
+        statuses = Batch(MessageReadStatus, self.batch_size)
+        recent_ids = []
+
+        def save_read_statuses(messages):
+            for message in messages:
+                recent_ids.append(message.pk)
+                for user_id, read_at in message.readers:
+                    statuses.add(MessageReadStatus(message_id=message.pk, user_id=user_id, read_at=read_at))
+            del recent_ids[:-REPLY_WINDOW]
+
+        messages = Batch(Message, self.batch_size, on_flush=save_read_statuses)
+        for family_id, members in self.family_members.items():
+            created_at = min(joined_at for _, joined_at in members)
+            timestamps = sorted(self.random_time(created_at) for _ in range(self.count(MESSAGES_PER_FAMILY)))
+            # Everyone has read the family's history except their last few unread messages
+            unread_from = {user_id: len(timestamps) - self.count(UNREAD_PER_MEMBER) for user_id, _ in members}
+            messages.flush()
+            recent_ids.clear()
+
+            for index, timestamp in enumerate(timestamps):
+                if index % REPLY_WINDOW == 0:
+                    # Save what we have so replies can point at the family's earlier messages
+                    messages.flush()
+                present = [user_id for user_id, joined_at in members if joined_at <= timestamp]
+                sender = rng.choice(present)
+                content = text(rng, int(rng.lognormvariate(2, 0.8)))
+                is_deleted = rng.random() < 0.01
+                is_edited = not is_deleted and rng.random() < 0.03
+                message = Message(
+                    family_id=family_id, sender_id=sender, content='' if is_deleted else content,
+                    message_type='system' if rng.random() < 0.01 else 'text',
+                    is_deleted=is_deleted, is_edited=is_edited, timestamp=timestamp,
+                    updated_at=self.random_time(timestamp) if is_deleted or is_edited else timestamp,
+                    reply_to_id=rng.choice(recent_ids) if recent_ids and rng.random() < REPLY_SHARE else None,
+                )
+                message.readers = [
+                    (user_id, min(self.now, timestamp + timedelta(minutes=rng.expovariate(1 / 90))))
+                    for user_id in present
+                    if user_id != sender and index < unread_from[user_id]
+                ]
+                messages.add(message)
+        messages.flush()
+        statuses.flush()
+        self.report('chat messages', messages.created)
+        self.report('message read statuses', statuses.created)
+
+    def seed_personal_data(self, users, family_of):
+        rng = self.rng
+        # Bulk writes bypass the sync signals, so record the change log explicitly
+        expenses = Batch(Expense, self.batch_size, on_flush=record_changes)
+        udhars = Batch(Udhar, self.batch_size)
+        repayments = Batch(Repayment, self.batch_size)
+        attendance = Batch(Attendance, self.batch_size, on_flush=record_changes)
+        notes = Batch(Note, self.batch_size, on_flush=record_changes)
+
+        def save_repayments(saved):
+            record_changes(saved)
+            for udhar in saved:
+                for repayment in udhar.pending_repayments:
+                    repayment.udhar_id = udhar.pk
+                    repayments.add(repayment)
+        udhars.on_flush = save_repayments
+
+        for user in users:
+            joined = user.date_joined
+            days = (self.now - joined).days
+            family_id = family_of.get(user.pk)
+
+            for _ in range(int(days * EXPENSES_PER_USER_DAY * self.activity * rng.uniform(0.2, 1.8))):
+                expenses.add(self.make_expense(user.pk, family_id, joined))
+
+            for _ in range(self.count(UDHARS_PER_USER)):
+                udhars.add(self.make_udhar(user.pk, joined))
+
+            if rng.random() < ATTENDANCE_SHARE:
+                for record in self.attendance_streaks(user.pk, joined):
+                    attendance.add(record)
+
+            for _ in range(self.count(NOTES_PER_USER)):
+                created_at = self.random_time(joined)
+                notes.add(Note(
+                    user_id=user.pk, title=text(rng, rng.randint(1, 6)).capitalize() if rng.random() < 0.8 else '',
+                    # Mostly short notes with a long tail of very long ones
+                    content=text(rng, min(4000, int(rng.lognormvariate(4, 1.1)))),
+                    color_id=rng.choice(NOTE_COLORS), is_pinned=rng.random() < 0.1,
+                    created_at=created_at, updated_at=self.random_time(created_at),
+                ))
+
+        for batch in (expenses, udhars, repayments, attendance, notes):
+            batch.flush()
+        self.report('expenses', expenses.created)
+        self.report('udhars', udhars.created)
+        self.report('repayments', repayments.created)
+        self.report('attendance records', attendance.created)
+        self.report('notes', notes.created)
+
+    def make_expense(self, user_id, family_id, joined):
+        rng = self.rng
+        created_at = self.random_time(joined)
+        category = rng.choice(CATEGORIES)
+        items = [
+            {'name': rng.choice(ITEMS[category]), 'quantity': rng.randint(1, 4), 'price': float(money(rng, 10, 800, 5))}
+            for _ in range(rng.randint(0, 5))
+        ]
+        amount = (Decimal(str(sum(item['price'] * item['quantity'] for item in items))).quantize(Decimal('0.01'))
+                  if items else money(rng, 20, 5000, 10))
+        return Expense(
+            user_id=user_id,
+            family_id=family_id if family_id and rng.random() < FAMILY_EXPENSE_SHARE else None,
+            amount=amount, category=category, date=timezone.localdate(created_at),
+            description=text(rng, rng.randint(0, 8)) if rng.random() < 0.5 else '',
+            uuid=uuid.UUID(int=rng.getrandbits(128)).hex if rng.random() < 0.8 else None,
+            items=items, created_at=created_at, updated_at=self.random_time(created_at),
+        )
+
+    def make_udhar(self, user_id, joined):
+        rng = self.rng
+        created_at = self.random_time(joined)
+        amount = money(rng, 500, 50000, 100)
+        udhar = Udhar(
+            user_id=user_id, person_name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            amount=amount, rate=money(rng, 1, 3, 0.5) if rng.random() < 0.3 else None,
+            date=timezone.localdate(created_at),
+            due_date=timezone.localdate(created_at) + timedelta(days=rng.randint(15, 180)) if rng.random() < 0.5 else None,
+            reason=text(rng, rng.randint(0, 10)), type=rng.choice(('GIVE', 'TAKE')),
+            created_at=created_at, updated_at=created_at,
+        )
+        udhar.pending_repayments = []
+        paid = Decimal('0')
+        paid_at = created_at
+        for _ in range(rng.randint(0, 4)):
+            paid_at = self.random_time(paid_at)
+            part = min(amount - paid, money(rng, 100, float(amount) / 2, 100))
+            if part <= 0:
+                break
+            paid += part
+            udhar.pending_repayments.append(Repayment(
+                amount=part, date=paid_at, note=text(rng, rng.randint(0, 4)), created_at=paid_at))
+        if paid < amount and udhar.pending_repayments and rng.random() < 0.4:
+            paid_at = self.random_time(paid_at)
+            udhar.pending_repayments.append(Repayment(amount=amount - paid, date=paid_at, note='', created_at=paid_at))
+            paid = amount
+        udhar.is_closed = paid >= amount
+        udhar.updated_at = paid_at
+        return udhar
+
+    def attendance_streaks(self, user_id, joined):
+        """Working days with Sundays off, occasional half days and multi-day gaps."""
+        rng = self.rng
+        day = timezone.localdate(self.random_time(joined))
+        today = timezone.localdate(self.now)
+        while day <= today:
+            if rng.random() < 0.02:
+                # Leave, travel or a stretch of not using the app
+                day += timedelta(days=rng.choice((2, 3, 5, 10, 30)))
+                continue
+            if day.weekday() != 6:
+                marked_at = timezone.make_aware(datetime.combine(day, datetime.min.time())) + timedelta(hours=rng.uniform(9, 22))
+                yield Attendance(
+                    user_id=user_id, date=day,
+                    status='HALF-DAY' if rng.random() < 0.08 else 'FULL-DAY',
+                    remark=text(rng, rng.randint(1, 5)) if rng.random() < 0.05 else None,
+                    updated_at=min(marked_at, self.now),
+                )
+            day += timedelta(days=1)
@@ -0,0 +1,124 @@
+"""
+Prometheus metrics, served at /metrics.
+
+Under gunicorn set PROMETHEUS_MULTIPROC_DIR to an empty, writable directory
+before the workers start (and clear it on restart), and call
+prometheus_client.multiprocess.mark_process_dead(worker.pid) from the
+child_exit server hook. Every worker then writes its samples there and
+/metrics aggregates all of them; without it the endpoint reports the
+serving process only.
+
+Task-queue depth is read from the database at scrape time.
+"""
+import hmac
+import os
+
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Count
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', "Request latency by URL name.",
+    ['view', 'method', 'status'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_DB_QUERIES = Histogram(
+    'http_request_db_queries', "Database queries per request by URL name.",
+    ['view'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100),
+)
+REQUEST_DB_TIME = Histogram(
+    'http_request_db_seconds', "Database time per request by URL name.",
+    ['view'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+FCM_MESSAGES = Counter(
+    'fcm_messages_total', "Push notifications handed to FCM, by result.",
+    ['result'],
+)
+SMTP_SEND_LATENCY = Histogram(
+    'smtp_send_duration_seconds', "Time to send one email over SMTP.",
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests_total', "Cache lookups by cache location and result.",
+    ['cache', 'result'],
+)
+
+
+def observe_request(request, response, metrics):
+    """Record a finished request (called by PerformanceMiddleware)."""
+    match = getattr(request, 'resolver_match', None)
+    # Unresolved paths share one label so scanners can't blow up cardinality
+    view = (match.view_name or match.url_name) if match else 'unresolved'
+    REQUEST_LATENCY.labels(view, request.method, str(response.status_code)).observe(metrics.total_time)
+    REQUEST_DB_QUERIES.labels(view).observe(metrics.db_queries)
+    REQUEST_DB_TIME.labels(view).observe(metrics.db_time)
+
+def observe_push(success_count, failure_count):
+    if success_count:
+        FCM_MESSAGES.labels('success').inc(success_count)
+    if failure_count:
+        FCM_MESSAGES.labels('failure').inc(failure_count)
+
+
+class InstrumentedLocMemCache(LocMemCache):
+    """
+    LocMemCache that counts hits and misses in CACHE_REQUESTS, labelled with
+    its LOCATION. get_many() goes through get(), so it is counted per key.
+    """
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self.label = name or 'default'
+
+    def get(self, key, default=None, version=None):
+        missing = object()
+        value = super().get(key, missing, version)
+        CACHE_REQUESTS.labels(self.label, 'miss' if value is missing else 'hit').inc()
+        return default if value is missing else value
+
+
+class TaskQueueCollector:
+    """Current number of tasks per status, queried when scraped."""
+
+    def collect(self):
+        from taskqueue.models import Task
+
+        gauge = GaugeMetricFamily('taskqueue_tasks', "Tasks in the queue by status.", labels=['status'])
+        counts = dict(Task.objects.order_by().values_list('status').annotate(n=Count('pk')))
+        for status, _ in Task.STATUS_CHOICES:
+            if status != 'done':
+                gauge.add_metric([status], counts.get(status, 0))
+        yield gauge
+
+
+# Not auto-described, so registering doesn't query the database at import
+TASK_REGISTRY = CollectorRegistry()
+TASK_REGISTRY.register(TaskQueueCollector())
+
+
+def metrics_view(request):
+    # Closed until a token is configured
+    token = settings.METRICS_TOKEN
+    if not token or not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponseForbidden()
+
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    body = generate_latest(registry) + generate_latest(TASK_REGISTRY)
+    return HttpResponse(body, content_type=CONTENT_TYPE_LATEST)
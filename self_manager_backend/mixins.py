@@ -0,0 +1,54 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+
+
+class ConditionalListMixin:
+    """
+    Conditional GET (ETag) for ViewSet list endpoints.
+
+    The validators are computed with a single aggregate query over the list
+    queryset, so an unchanged collection is answered with 304 Not Modified
+    without fetching or serializing any rows.
+
+    No Last-Modified is sent: deleting a row doesn't move the newest
+    timestamp, so If-Modified-Since would answer 304 after a delete. The row
+    count in the ETag does change.
+    """
+    conditional_timestamp_field = 'updated_at'
+
+    def get_list_validators(self, queryset):
+        """
+        Return (last_modified, tokens) for the list queryset. `tokens` holds any
+        extra values that must change whenever the response body would.
+        """
+        agg = queryset.order_by().aggregate(
+            last_modified=Max(self.conditional_timestamp_field),
+            count=Count('pk'),
+        )
+        return agg['last_modified'], [agg['count']]
+
+    def get_list_etag(self, request, last_modified, tokens):
+        parts = [
+            str(request.user.pk),
+            request.get_full_path(),
+            last_modified.isoformat() if last_modified else '',
+            *[str(token) for token in tokens],
+        ]
+        return quote_etag(hashlib.md5('|'.join(parts).encode()).hexdigest())
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        last_modified, tokens = self.get_list_validators(queryset)
+        etag = self.get_list_etag(request, last_modified, tokens)
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+
+        response['ETag'] = etag
+        # Responses are per user, keyed on the bearer token
+        patch_vary_headers(response, ('Authorization',))
+        return response
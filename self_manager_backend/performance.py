@@ -0,0 +1,185 @@
+"""
+Per-request (and per-task) performance instrumentation.
+
+PerformanceMiddleware records database query count and time, serializer
+time, time spent in external calls (FCM, SMTP) and total time for every
+request. The numbers are logged as one key=value line per request at DEBUG
+on the `self_manager_backend.performance` logger, and returned in a
+Server-Timing header when DEBUG is on or the user is staff. Queries slower
+than PERFORMANCE_SLOW_QUERY_MS are logged at WARNING with their SQL and the
+project code that ran them.
+
+Code that calls out to other services wraps the call in `timed('fcm')` etc.
+"""
+import logging
+import time
+import traceback
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import observe_request
+
+logger = logging.getLogger(__name__)
+
+_metrics = ContextVar('performance_metrics', default=None)
+
+EXTERNAL_KINDS = ('fcm', 'smtp')
+
+
+class Metrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.external = {}
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def external_time(self):
+        return sum(self.external.values())
+
+    def fields(self):
+        """Milliseconds, rounded for logging."""
+        fields = {
+            'total_ms': round(self.total_time * 1000, 1),
+            'db_ms': round(self.db_time * 1000, 1),
+            'db_queries': self.db_queries,
+            'serializer_ms': round(self.serializer_time * 1000, 1),
+            'external_ms': round(self.external_time * 1000, 1),
+        }
+        for kind, seconds in self.external.items():
+            fields[f'{kind}_ms'] = round(seconds * 1000, 1)
+        return fields
+
+    def server_timing(self):
+        entries = [
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.db_queries} queries"',
+            f'serializer;dur={self.serializer_time * 1000:.1f}',
+        ]
+        entries += [f'{kind};dur={seconds * 1000:.1f}' for kind, seconds in self.external.items()]
+        entries.append(f'total;dur={self.total_time * 1000:.1f}')
+        return ', '.join(entries)
+
+
+def current_metrics():
+    return _metrics.get()
+
+def format_fields(fields):
+    return ' '.join(f'{key}={value}' for key, value in fields.items())
+
+
+@contextmanager
+def timed(kind):
+    """Add the time spent in the block to the current request's `kind` external time."""
+    metrics = _metrics.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.external[kind] = metrics.external.get(kind, 0.0) + time.perf_counter() - started
+
+
+def call_site():
+    """'path:line in function' of the innermost project frame outside this module."""
+    base_dir = str(settings.BASE_DIR)
+    this_file = str(Path(__file__).resolve())
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(base_dir) and frame.filename != this_file:
+            return f'{Path(frame.filename).relative_to(base_dir)}:{frame.lineno} in {frame.name}'
+    return 'unknown'
+
+def record_query(execute, sql, params, many, context):
+    metrics = _metrics.get()
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        if metrics is not None:
+            metrics.db_queries += 1
+            metrics.db_time += duration
+        if duration * 1000 >= settings.PERFORMANCE_SLOW_QUERY_MS:
+            logger.warning(
+                "slow_query %s sql=%r",
+                format_fields({
+                    'duration_ms': round(duration * 1000, 1),
+                    'db': context['connection'].alias,
+                    'site': call_site(),
+                }),
+                sql,
+            )
+
+
+@contextmanager
+def track():
+    """Collect Metrics for the block; yields the Metrics object."""
+    metrics = Metrics()
+    token = _metrics.set(metrics)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(record_query))
+            yield metrics
+    finally:
+        _metrics.reset(token)
+
+
+def install_serializer_timing():
+    """
+    Time `serializer.data` (where DRF runs to_representation). Only the
+    outermost serializer is timed, nested ones are part of it.
+    """
+    from rest_framework.serializers import BaseSerializer
+
+    data = BaseSerializer.data
+    if getattr(data.fget, 'timed', False):
+        return
+
+    def timed_data(self):
+        metrics = _metrics.get()
+        if metrics is None:
+            return data.fget(self)
+        metrics.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return data.fget(self)
+        finally:
+            metrics.serializer_depth -= 1
+            if not metrics.serializer_depth:
+                metrics.serializer_time += time.perf_counter() - started
+
+    timed_data.timed = True
+    BaseSerializer.data = property(timed_data)
+
+
+class PerformanceMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with track() as metrics:
+            response = self.get_response(request)
+
+        if settings.DEBUG or getattr(getattr(request, 'user', None), 'is_staff', False):
+            response['Server-Timing'] = metrics.server_timing()
+        observe_request(request, response, metrics)
+        if logger.isEnabledFor(logging.DEBUG):
+            match = getattr(request, 'resolver_match', None)
+            logger.debug("request %s", format_fields({
+                'method': request.method,
+                'path': request.path,
+                'view': match.view_name if match else '',
+                'status': response.status_code,
+                **metrics.fields(),
+            }))
+        return response
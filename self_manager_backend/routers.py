@@ -0,0 +1,118 @@
+"""
+Read-replica routing.
+
+Reads go to the primary unless the code doing them opts in with
+
+    with read_replica():
+        ...
+
+and a replica is configured (DATABASE_REPLICA_URL). To keep read-your-writes
+consistency, a user whose request wrote to the database is pinned to the
+primary for REPLICA_PIN_SECONDS, and reads after a write in the same request
+stay on the primary as well. ReplicaPinningMiddleware records pins in the
+REPLICA_PIN_CACHE cache, which every worker must share (a database cache on
+the primary by default).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Per-request state set by ReplicaPinningMiddleware: {'request': ..., 'wrote': bool}
+_request_state = ContextVar('db_request_state', default=None)
+_use_replica = ContextVar('db_use_replica', default=False)
+
+
+def pin_cache_key(user_id):
+    return f'db:pin:{user_id}'
+
+def pin_cache():
+    return caches[settings.REPLICA_PIN_CACHE]
+
+def replica_configured():
+    return settings.DATABASE_REPLICA_ALIAS in settings.DATABASES
+
+def is_pinned(user):
+    if user is None or not getattr(user, 'is_authenticated', False):
+        return False
+    return bool(pin_cache().get(pin_cache_key(user.pk)))
+
+
+def read_alias(user=None):
+    """
+    The alias a replica-eligible read for `user` should use: the replica,
+    unless none is configured or the user is pinned to the primary. `user`
+    defaults to the requesting user.
+    """
+    state = _request_state.get()
+    if user is None and state is not None:
+        user = getattr(state['request'], 'user', None)
+    if replica_configured() and not is_pinned(user):
+        return settings.DATABASE_REPLICA_ALIAS
+    return 'default'
+
+@contextmanager
+def read_replica(user=None):
+    """
+    Route reads inside the block to the replica (see read_alias). For lazy
+    work such as generators, pass read_alias() to queryset.using() instead.
+    """
+    token = _use_replica.set(read_alias(user) != 'default')
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def _is_cache_table(model):
+    # DatabaseCache routes its queries too; pins must be read from the primary
+    # and touching them isn't a write of the request's own
+    return model._meta.app_label == 'django_cache'
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _use_replica.get() or _is_cache_table(model):
+            return None
+        state = _request_state.get()
+        if state is not None and state['wrote']:
+            return None
+        return settings.DATABASE_REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None and not _is_cache_table(model):
+            state['wrote'] = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema through replication
+        return db != settings.DATABASE_REPLICA_ALIAS
+
+
+class ReplicaPinningMiddleware:
+    """
+    Tracks whether a request wrote to the database and, if so, pins the
+    authenticated user to the primary for REPLICA_PIN_SECONDS.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = {'request': request, 'wrote': False}
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+
+        # request.user is set by DRF authentication during the view
+        user = getattr(request, 'user', None)
+        if state['wrote'] and replica_configured() and user is not None and user.is_authenticated:
+            pin_cache().set(pin_cache_key(user.pk), True, settings.REPLICA_PIN_SECONDS)
+        return response
@@ -7,6 +7,8 @@ Generated by 'django-admin startproject' using Django 5.2.9.
 import os
 from pathlib import Path
 
+from .database_url import database_from_env
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -38,6 +40,7 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
     'corsheaders',
     # Local apps
+    'self_manager_backend',
     'users',
     'attendance',
     'notes',
@@ -45,10 +48,15 @@ INSTALLED_APPS = [
     'expenses',
     'udhar',
     'chat',
+    'sync',
+    'analytics',
+    'taskqueue',
 ]
 
 
 MIDDLEWARE = [
+    # Outermost, so its total covers every other middleware
+    'self_manager_backend.performance.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -56,6 +64,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'self_manager_backend.routers.ReplicaPinningMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -66,13 +75,18 @@ CORS_ALLOW_ALL_ORIGINS = True
 # REST framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ProfileJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),  
 }
 
+SIMPLE_JWT = {
+    # Token logins record last_login, which the daily login metrics are rolled up from
+    'UPDATE_LAST_LOGIN': True,
+}
+
 
 ROOT_URLCONF = 'self_manager_backend.urls'
 
@@ -97,11 +111,36 @@ WSGI_APPLICATION = 'self_manager_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Configured from the environment (DATABASE_URL, DATABASE_CONN_MAX_AGE, ...),
+# see self_manager_backend/database_url.py. Defaults to the local SQLite file.
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+    'default': database_from_env(os.environ, 'sqlite:///db.sqlite3', base_dir=BASE_DIR),
+}
+
+# Optional read replica for heavy read-only queries (self_manager_backend.routers).
+# Tests run it as a mirror of the default database.
+DATABASE_REPLICA_ALIAS = 'replica'
+if os.environ.get('DATABASE_REPLICA_URL'):
+    DATABASES[DATABASE_REPLICA_ALIAS] = {
+        **database_from_env({**os.environ, 'DATABASE_URL': os.environ['DATABASE_REPLICA_URL']},
+                            'sqlite:///db.sqlite3', base_dir=BASE_DIR),
+        'TEST': {'MIRROR': 'default'},
     }
+DATABASE_ROUTERS = ['self_manager_backend.routers.ReplicaRouter']
+# Seconds a user reads from the primary after a request of theirs wrote to it
+REPLICA_PIN_SECONDS = 10
+# Cache holding those pins; it must be shared between workers
+REPLICA_PIN_CACHE = 'replica_pins'
+
+# Applied to every SQLite connection when it is opened (self_manager_backend.db).
+# busy_timeout comes first so switching the journal mode can wait for the lock.
+SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,          # ms a writer waits for the lock
+    'journal_mode': 'WAL',         # readers don't block writers (persists in the file)
+    'synchronous': 'NORMAL',       # durable across app crashes; fsync at checkpoints under WAL
+    'mmap_size': 134217728,        # 128 MiB memory-mapped I/O
+    'cache_size': -20000,          # negative = KiB, i.e. ~20 MB page cache per connection
+    'temp_store': 'MEMORY',
 }
 
 
@@ -153,6 +192,21 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Key for the family code permutation (families/codes.py). Must stay stable once
+# codes have been issued. Existing codes were issued with SECRET_KEY, so before
+# rotating SECRET_KEY, pin its current value in the FAMILY_CODE_KEY environment
+# variable.
+FAMILY_CODE_KEY = os.environ.get('FAMILY_CODE_KEY', SECRET_KEY)
+
+# Soft-deleted accounts are purged by `manage.py purge_deleted_accounts` after this many days
+ACCOUNT_PURGE_RETENTION_DAYS = 30
+
+# Data exports with more rows than this are built in the background instead of streamed
+EXPORT_STREAM_MAX_ROWS = 20000
+
+# Default daily rate for attendance pay summaries (None = only when ?daily_rate= is passed)
+ATTENDANCE_DAILY_RATE = None
+
 # Email Configuration 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
@@ -175,3 +229,67 @@ if not DEBUG:
     SECURE_HSTS_SECONDS = 31536000  # 1 year
     SECURE_HSTS_INCLUDE_SUBDOMAINS = True
     SECURE_HSTS_PRELOAD = True
+
+# Background task queue (taskqueue app, run with `manage.py runworker`)
+TASKQUEUE_EAGER = False  # run tasks inline on enqueue, e.g. in development
+TASKQUEUE_MAX_ATTEMPTS = 5
+TASKQUEUE_RETRY_BACKOFF = 30  # seconds before the first retry, doubled on each further failure
+TASKQUEUE_LOCK_TIMEOUT = 900  # running tasks older than this are assumed abandoned
+TASKQUEUE_KEEP_DONE_DAYS = 7
+
+# Skips tests tagged 'benchmark' unless run with --tag benchmark
+TEST_RUNNER = 'self_manager_backend.test_runner.TestRunner'
+
+# Request instrumentation (self_manager_backend.performance)
+PERFORMANCE_SLOW_QUERY_MS = 100
+
+CACHES = {
+    'default': {
+        # LocMemCache that also reports hit/miss counts to /metrics
+        'BACKEND': 'self_manager_backend.metrics.InstrumentedLocMemCache',
+        'LOCATION': 'default',
+    },
+    # Shared by every worker; create the table with `manage.py createcachetable`
+    'replica_pins': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'replica_pins',
+    },
+    # Version counters for per-process cache entries (self_manager_backend.caches);
+    # its table is created by `manage.py createcachetable` too
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'shared_cache',
+        'OPTIONS': {'MAX_ENTRIES': 100_000},
+    },
+}
+
+# Prometheus metrics at /metrics (self_manager_backend.metrics). Scrapers must
+# send "Authorization: Bearer <METRICS_TOKEN>"; the endpoint is closed when unset.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'structured': {
+            'format': '%(asctime)s level=%(levelname)s logger=%(name)s %(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'structured',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': os.environ.get('LOG_LEVEL', 'INFO'),
+    },
+    'loggers': {
+        'django': {
+            'handlers': ['console'],
+            'level': os.environ.get('DJANGO_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+# A replica that mirrors the primary, for the read-replica routing tests
+REPLICA_MIRROR_ALIAS = 'replica_mirror'
+
+
+class TestRunner(DiscoverRunner):
+    """
+    The default runner, except that tests tagged 'benchmark' (they seed a
+    sizeable dataset) only run when asked for with --tag benchmark, and that
+    a REPLICA_MIRROR_ALIAS database is always available for tests to opt
+    into. A replica configured through DATABASE_REPLICA_URL is dropped: it
+    would only be a mirror of the test database, which TestCase reads can't
+    see through, so other tests read the primary.
+    """
+
+    def __init__(self, *args, tags=None, exclude_tags=None, **kwargs):
+        if not tags or 'benchmark' not in tags:
+            exclude_tags = {*(exclude_tags or ()), 'benchmark'}
+        super().__init__(*args, tags=tags, exclude_tags=exclude_tags, **kwargs)
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        # Before the suite is built, so databases = '__all__' sees the final set
+        self._replica = settings.DATABASES.pop(settings.DATABASE_REPLICA_ALIAS, None)
+        primary = settings.DATABASES['default']
+        settings.DATABASES[REPLICA_MIRROR_ALIAS] = {
+            **primary,
+            'TEST': {**primary.get('TEST', {}), 'MIRROR': 'default'},
+        }
+
+    def teardown_test_environment(self, **kwargs):
+        del settings.DATABASES[REPLICA_MIRROR_ALIAS]
+        if self._replica is not None:
+            settings.DATABASES[settings.DATABASE_REPLICA_ALIAS] = self._replica
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,158 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings, tag
+from rest_framework.test import APIClient
+
+from notes.models import Note
+
+from .benchmarks import (
+    ENDPOINTS,
+    api_url_names,
+    check_budgets,
+    format_results,
+    load_baseline,
+    prepare_fixtures,
+    run_benchmarks,
+    write_baseline,
+)
+from .routers import ReplicaPinningMiddleware, is_pinned, pin_cache, read_alias, read_replica
+from .test_runner import REPLICA_MIRROR_ALIAS
+
+# Endpoints deliberately left out of the benchmark
+NOT_BENCHMARKED = set()
+
+
+class EndpointCoverageTests(TestCase):
+    def test_every_api_endpoint_is_benchmarked(self):
+        benchmarked = {name for _, name, _, _ in ENDPOINTS}
+        missing = api_url_names() - benchmarked - NOT_BENCHMARKED
+        self.assertFalse(missing, f"Add these URL names to benchmarks.ENDPOINTS: {sorted(missing)}")
+
+
+class MetricsEndpointTests(TestCase):
+    @override_settings(METRICS_TOKEN='')
+    def test_closed_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='scrape')
+    def test_requires_the_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape').status_code, 200)
+
+
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def get_notes(self, user):
+        self.client.force_authenticate(user)
+        return self.client.get('/api/notes/')
+
+    def test_server_timing_is_for_staff(self):
+        response = self.get_notes(User.objects.create_user('alice'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Server-Timing', response)
+
+        response = self.get_notes(User.objects.create_user('staff', is_staff=True))
+        self.assertIn('db;dur=', response['Server-Timing'])
+
+    @override_settings(DEBUG=True)
+    def test_server_timing_in_debug(self):
+        self.assertIn('Server-Timing', self.get_notes(User.objects.create_user('alice')))
+
+    def test_requests_are_logged_at_debug(self):
+        with self.assertLogs('self_manager_backend.performance', 'DEBUG') as logs:
+            self.get_notes(User.objects.create_user('alice'))
+        self.assertEqual([record.levelname for record in logs.records], ['DEBUG'])
+        self.assertIn('view=notes-list', logs.output[0])
+
+
+@override_settings(DATABASE_REPLICA_ALIAS=REPLICA_MIRROR_ALIAS)
+class ReplicaRoutingTests(TransactionTestCase):
+    """Routing against a replica that is a test mirror of the primary."""
+    databases = {'default', REPLICA_MIRROR_ALIAS}
+
+    def setUp(self):
+        # The pin table is not flushed between tests
+        pin_cache().clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+
+    def test_opted_in_reads_use_the_replica(self):
+        with read_replica(self.user):
+            self.assertEqual(User.objects.all().db, REPLICA_MIRROR_ALIAS)
+            self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
+        self.assertEqual(User.objects.all().db, 'default')
+
+    def test_write_pins_reads_to_the_primary(self):
+        def view(request):
+            with read_replica():
+                reads = [router.db_for_read(Note)]
+                Note.objects.create(user=self.user, title='Pinned')
+                reads.append(router.db_for_read(Note))
+            self.assertEqual(reads, [REPLICA_MIRROR_ALIAS, 'default'])
+            return HttpResponse()
+
+        request = RequestFactory().post('/')
+        request.user = self.user
+        ReplicaPinningMiddleware(view)(request)
+
+        # The pin is in the shared store, not in this process's cache
+        cache.clear()
+        self.assertTrue(is_pinned(self.user))
+        self.assertEqual(read_alias(self.user), 'default')
+        self.assertEqual(read_alias(User.objects.create_user('bob')), REPLICA_MIRROR_ALIAS)
+
+    def test_api_write_pins_the_user(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.get('/api/attendance/summary/').status_code, 200)
+        self.assertFalse(is_pinned(self.user))
+
+        self.assertEqual(client.post('/api/notes/', {'title': 'Note'}).status_code, 201)
+        self.assertTrue(is_pinned(self.user))
+        self.assertEqual(client.get('/api/attendance/summary/').status_code, 200)
+
+
+@tag('benchmark')
+class EndpointBenchmarkTests(TestCase):
+    """
+    Runs every API endpoint against the dataset described in
+    benchmark_baseline.json and fails on budget regressions:
+
+        python manage.py test self_manager_backend --tag benchmark
+
+    After an intended change, re-record the baseline with
+    UPDATE_BENCHMARK_BASELINE=1 set.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # The ready data export's archive is written to storage
+        media_root = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(media_root.cleanup)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root.name))
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.baseline = load_baseline()
+        call_command('seed_perf_data', stdout=StringIO(), **cls.baseline['dataset'])
+        cls.fixtures = prepare_fixtures()
+
+    def test_endpoints_within_budget(self):
+        iterations = self.baseline['iterations']
+        results = run_benchmarks(self.fixtures, iterations=iterations)
+
+        if os.environ.get('UPDATE_BENCHMARK_BASELINE'):
+            write_baseline(results, self.baseline['dataset'], iterations)
+            self.skipTest("Baseline re-recorded.")
+        failures = check_budgets(results, self.baseline)
+        self.assertFalse(failures, "Endpoints over budget:\n" + '\n'.join(failures) + '\n\n' + format_results(results))
@@ -9,7 +9,8 @@ from notes.views import NoteViewSet
 from families.views import FamilyViewSet, FamilyMemberViewSet, invite_bridge
 from expenses.views import ExpenseViewSet
 from udhar.views import UdharViewSet
-from users.views import RegisterView, MeView, SendOTPView, VerifyOTPView, ResetPasswordView, GoogleLoginView, UpdateFCMTokenView, DeleteAccountView, CustomTokenObtainPairView
+from sync.views import SyncView
+from users.views import RegisterView, MeView, SendOTPView, VerifyOTPView, ResetPasswordView, GoogleLoginView, UpdateFCMTokenView, DeleteAccountView, CustomTokenObtainPairView, BootstrapView, DataExportView, DataExportDetailView, DataExportDownloadView
 
 router = routers.DefaultRouter()
 router.register(r'attendance', AttendanceViewSet, basename='attendance')
@@ -22,12 +23,14 @@ router.register(r'udhar', UdharViewSet, basename='udhar')
 from django.conf import settings
 from django.conf.urls.static import static
 
+from .metrics import metrics_view
 from .views import (
     custom_page_not_found_view, 
     custom_error_view, 
     custom_permission_denied_view, 
     custom_bad_request_view,
     admin_dashboard_view,
+    refresh_dashboard_stats_view,
     admin_login_view,
     admin_logout_view,
     communications_view,
@@ -38,12 +41,14 @@ from .views import (
 urlpatterns = [
     path('', admin_dashboard_view, name='admin_dashboard'),
     path('dashboard/', admin_dashboard_view, name='admin_dashboard_alt'),
+    path('dashboard/refresh-stats/', refresh_dashboard_stats_view, name='refresh_dashboard_stats'),
     path('dashboard/communications/', communications_view, name='communications'),
     path('dashboard/communications/send-email/', send_bulk_email, name='send_bulk_email'),
     path('dashboard/communications/send-notify/', send_bulk_notification, name='send_bulk_notification'),
     path('dashboard/login/', admin_login_view, name='admin_login'),
     path('dashboard/logout/', admin_logout_view, name='admin_logout'),
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('api/auth/token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/auth/register/', RegisterView.as_view(), name='auth_register'),
@@ -54,7 +59,12 @@ urlpatterns = [
     path('api/users/update-fcm-token/', UpdateFCMTokenView.as_view(), name='update_fcm_token'),
     path('api/users/delete-account/', DeleteAccountView.as_view(), name='delete_account'),
     path('api/users/me/', MeView.as_view(), name='user_me'),
+    path('api/users/export/', DataExportView.as_view(), name='data_export'),
+    path('api/users/export/<int:export_id>/', DataExportDetailView.as_view(), name='data_export_detail'),
+    path('api/users/export/<int:export_id>/download/', DataExportDownloadView.as_view(), name='data_export_download'),
+    path('api/bootstrap/', BootstrapView.as_view(), name='bootstrap'),
     path('api/chat/', include('chat.urls')),
+    path('api/sync/', SyncView.as_view(), name='sync'),
     path('api/', include(router.urls)),
     path('families/invite/<code>/', invite_bridge, name='family_invite'),
     
@@ -4,72 +4,47 @@ from django.template import loader
 from django.contrib.auth.decorators import user_passes_test
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
-from django.db.models import Count
+from django.views.decorators.http import require_POST
 from django.conf import settings
-import os
 
 # Import Models
 from django.contrib.auth import get_user_model
-from families.models import Family
-from expenses.models import Expense
-from notes.models import Note
-from udhar.models import Udhar
+from analytics.rollups import SERIES_RANGES, growth_series
+from analytics.stats import get_dashboard_stats, refresh_dashboard_stats
 
 User = get_user_model()
 
 def is_superuser(user):
     return user.is_authenticated and user.is_superuser
 
-@user_passes_test(is_superuser, login_url='/login/')
-
 @user_passes_test(is_superuser, login_url='/login/')
 def admin_dashboard_view(request):
     """
     Superadmin Dashboard View.
-    Only accessible by superusers.
+    Only accessible by superusers. Reads the stats snapshot and the daily
+    rollups rather than counting every table on each page load.
     """
-    # 1. User Stats
-    total_users = User.objects.count()
-    active_users_24h = User.objects.filter(is_active=True).count() # Simplified, usually check last_login
-
-    # 2. App Data Stats
-    total_families = Family.objects.count()
-    total_expenses = Expense.objects.count()
-    total_notes = Note.objects.count()
-    total_udhar = Udhar.objects.count()
-
-    # 3. Storage Stats (Approximate DB size)
-    db_path = settings.DATABASES['default']['NAME']
-    db_size = 0
-    if os.path.exists(db_path):
-        db_size = os.path.getsize(db_path)
-    
-    # Format DB Size
-    def format_size(size):
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size < 1024:
-                return f"{size:.2f} {unit}"
-            size /= 1024
-        return f"{size:.2f} TB"
-
-    db_size_formatted = format_size(db_size)
-
-    # 4. Recent Users
-    recent_users = User.objects.order_by('-date_joined')[:5]
-
-    context = {
-        'total_users': total_users,
-        'active_users': active_users_24h,
-        'total_families': total_families,
-        'total_expenses': total_expenses,
-        'total_notes': total_notes,
-        'total_udhar': total_udhar,
-        'db_size': db_size_formatted,
-        'recent_users': recent_users
-    }
-
+    try:
+        days = int(request.GET.get('range', SERIES_RANGES[0]))
+    except ValueError:
+        days = SERIES_RANGES[0]
+    if days not in SERIES_RANGES:
+        days = SERIES_RANGES[0]
+
+    context = get_dashboard_stats()
+    context['growth'] = growth_series(days)
+    context['growth_ranges'] = SERIES_RANGES
     return render(request, 'dashboard.html', context)
 
+@require_POST
+@user_passes_test(is_superuser, login_url='/login/')
+def refresh_dashboard_stats_view(request):
+    """
+    Recompute the stats snapshot on demand (the dashboard's refresh button).
+    """
+    refresh_dashboard_stats()
+    return redirect('admin_dashboard')
+
 def admin_login_view(request):
     if request.method == 'POST':
         email = request.POST.get('email')
@@ -139,19 +114,18 @@ def communications_view(request):
     """
     Renders the Communications Center for sending Emails and Notifications.
     """
-    total_users = User.objects.count()
-    active_users = User.objects.filter(is_active=True).count()
-    
-    # Estimate devices
-    from users.models import Profile
-    total_devices = Profile.objects.exclude(fcm_token__isnull=True).exclude(fcm_token__exact='').count()
-    
-    context = {
-        'total_users': total_users,
-        'active_users': active_users,
-        'total_devices': total_devices
+    return render(request, 'admin/communications.html', communication_stats())
+
+def communication_stats():
+    """
+    Audience totals shown on the Communications Center, from the stats snapshot.
+    """
+    stats = get_dashboard_stats()
+    return {
+        'total_users': stats['total_users'],
+        'active_users': stats['active_users'],
+        'total_devices': stats.get('total_devices', 0),
     }
-    return render(request, 'admin/communications.html', context)
 
 @user_passes_test(is_superuser, login_url='/login/')
 def send_bulk_email(request):
@@ -170,46 +144,19 @@ def send_bulk_email(request):
     elif recipient_type == 'staff':
         users = User.objects.filter(is_staff=True)
         
-    success_count = 0
-    fail_count = 0
-    failed_emails = []
-    
-    from django.core.mail import send_mail
-    from django.conf import settings
-    
-    # In a real-world scenario, use a background task (Celery)
-    for user in users:
-        if user.email:
-            try:
-                send_mail(
-                    subject=subject,
-                    message="", # Plain text fallback
-                    html_message=body,
-                    from_email=settings.EMAIL_HOST_USER,
-                    recipient_list=[user.email],
-                    fail_silently=False
-                )
-                success_count += 1
-            except Exception as e:
-                fail_count += 1
-                failed_emails.append(f"{user.email}: {str(e)}")
-    
-    # Store results in session to show on redirect
-    # But for a simple admin dashboard, let's just render the page again with context
-    # Usually better to redirect to avoid form resubmission, but here we want to show logs immediately.
-    
-    # Re-fetch stats
-    from users.models import Profile
-    total_devices = Profile.objects.exclude(fcm_token__isnull=True).exclude(fcm_token__exact='').count()
-    
+    from users.tasks import send_email
+
+    # One task per recipient, so a failed address is retried on its own
+    recipients = users.exclude(email='').values_list('email', flat=True)
+    queued_count = send_email.enqueue_many(
+        ((email,), {'subject': subject, 'message': "", 'html_message': body})  # Plain text fallback
+        for email in recipients.iterator()
+    )
+
     context = {
-        'total_users': User.objects.count(),
-        'active_users': User.objects.filter(is_active=True).count(),
-        'total_devices': total_devices,
+        **communication_stats(),
         'email_results': {
-            'success_count': success_count,
-            'fail_count': fail_count,
-            'failed_emails': failed_emails
+            'queued_count': queued_count,
         }
     }
     return render(request, 'admin/communications.html', context)
@@ -232,59 +179,16 @@ def send_bulk_notification(request):
              # If invalid JSON, just ignore or send empty
              pass
              
-    from users.models import Profile
-    from users.notification_manager import NotificationManager
-    
-    # Get all valid tokens
-    profiles = Profile.objects.exclude(fcm_token__isnull=True).exclude(fcm_token__exact='')
-    tokens = [p.fcm_token for p in profiles]
-    
-    success = 0
-    failure = 0
-    
-    if tokens:
-        try:
-            # Note: send_multicast returns a batch response object
-            # We need to construct a robust way to capture results if we want detailed logs from FCM
-            # Our NotificationManager logs to console, but let's try to capture basic success/fail here
-            # Ideally NotificationManager should return stats.
-            
-            # Let's assume NotificationManager handles it safely. Use a custom call here for better control/stats if needed
-            # Or modify NotificationManager later to return stats.
-            # For now, we will trust the FireBase SDK response if we access it directly, 
-            # OR just wrap the manager call.
-            
-            result = NotificationManager.send_multicast_notification(tokens, title, message, data)
-            
-            if result:
-                success = result.get('success_count', 0)
-                failure = result.get('failure_count', 0)
-                
-                # Update UI message
-                context_msg = f"Sent: {success}, Failed: {failure}"
-                if result.get('error'):
-                    context_msg += f" (Error: {result.get('error')})"
-            else:
-                 # Should not happen with new manager logic
-                 failure = len(tokens)
-                 context_msg = "Failed to initiate sending"
+    from users.tasks import broadcast_notification
+
+    # Tokens are collected and sent in batches by the worker
+    broadcast_notification.enqueue(title, message, data)
+    context_msg = "Broadcast queued, it is delivered in the background."
 
-        except Exception as e:
-            failure = len(tokens)
-            context_msg = f"Error: {str(e)}"
-    else:
-        context_msg = "No devices found with tokens."
-    
-    # Re-fetch stats
-    total_devices = profiles.count()
-    
     context = {
-        'total_users': User.objects.count(),
-        'active_users': User.objects.filter(is_active=True).count(),
-        'total_devices': total_devices,
+        **communication_stats(),
         'notif_results': {
             'success': context_msg,
-            'failure': failure
         }
     }
     return render(request, 'admin/communications.html', context)
@@ -0,0 +1,50 @@
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+# (model label, scope field) for every synced model
+SYNCED = [
+    ('notes.note', 'user_id'),
+    ('attendance.attendance', 'user_id'),
+    ('udhar.udhar', 'user_id'),
+    ('expenses.expense', None),
+]
+
+
+def backfill(apps, schema_editor):
+    """Seed one upsert per existing row so `since=0` returns the full dataset."""
+    Change = apps.get_model('sync', 'Change')
+    for label, scope in SYNCED:
+        app_label, model_name = label.split('.')
+        Model = apps.get_model(app_label, model_name)
+        fields = ['pk', 'user_id'] + (['family_id'] if scope is None else [])
+        entries = []
+        for row in Model.objects.order_by('pk').values_list(*fields).iterator(chunk_size=BATCH_SIZE):
+            pk, user_id = row[0], row[1]
+            family_id = row[2] if scope is None else None
+            entries.append(Change(
+                model=label,
+                object_id=pk,
+                op='upsert',
+                user_id=None if family_id else user_id,
+                family_id=family_id,
+            ))
+            if len(entries) >= BATCH_SIZE:
+                Change.objects.bulk_create(entries)
+                entries = []
+        Change.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sync', '0001_initial'),
+        ('notes', '0003_note_user_pinned_updated_idx'),
+        ('attendance', '0003_attendance_updated_at'),
+        ('udhar', '0001_initial'),
+        ('expenses', '0004_expense_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
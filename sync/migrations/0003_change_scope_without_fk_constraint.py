@@ -0,0 +1,27 @@
+# Generated by Django 5.2.9 on 2026-10-19 18:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('families', '0004_family_updated_at'),
+        ('sync', '0002_backfill_changes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='change',
+            name='family',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='sync_changes', to='families.family'),
+        ),
+        migrations.AlterField(
+            model_name='change',
+            name='user',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='sync_changes', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import models
+from django.conf import settings
+
+class Change(models.Model):
+    """
+    One entry of the incremental sync log. The primary key doubles as the
+    monotonically increasing sequence clients pass back as `since`.
+
+    Only the latest entry per object is kept: recording a change deletes the
+    entries it supersedes, so the log stays proportional to the number of
+    live (or deleted) objects rather than the number of writes.
+    """
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+    OP_CHOICES = (
+        (UPSERT, 'Upsert'),
+        (DELETE, 'Delete'),
+    )
+
+    # Exactly one scope is set: per-user rows use `user`, shared family rows use `family`.
+    # No FK constraint: deleting a user or family writes tombstones for its rows
+    # while it is being deleted; sync.tracking removes them afterwards.
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='sync_changes')
+    family = models.ForeignKey('families.Family', on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='sync_changes')
+    model = models.CharField(max_length=50)  # app_label.model_name
+    object_id = models.BigIntegerField()
+    op = models.CharField(max_length=6, choices=OP_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='sync_change_user_seq_idx'),
+            models.Index(fields=['family', 'id'], name='sync_change_family_seq_idx'),
+            models.Index(fields=['model', 'object_id'], name='sync_change_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.op} {self.model}:{self.object_id}"
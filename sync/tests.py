@@ -0,0 +1,83 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from expenses.models import Expense
+from families.models import Family, FamilyMember
+from notes.models import Note
+from .models import Change
+
+
+def sync(user, since=0):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client.get('/api/sync/', {'since': since}).json()
+
+def ops(payload):
+    return [(change['model'], change['id'], change['op']) for change in payload['changes']]
+
+
+class ScopeDeletionTests(TransactionTestCase):
+    """Deleting a scope cascades into tombstones; the transaction must still commit."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'pw')
+        self.member = User.objects.create_user('member', 'member@example.com', 'pw')
+        self.family = Family.objects.create(name='Home', owner=self.owner)
+        FamilyMember.objects.create(family=self.family, user=self.owner)
+        FamilyMember.objects.create(family=self.family, user=self.member)
+        self.expense = Expense.objects.create(user=self.owner, family=self.family, amount='10.00', date=date(2026, 1, 1))
+        Note.objects.create(user=self.owner, title='Note')
+
+    def test_delete_family_with_expenses(self):
+        since = sync(self.member)['next_since']
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.delete(f'/api/families/{self.family.pk}/')
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Change.objects.filter(family_id=self.family.pk).exists())
+        # The member's copy of the family's expense is removed on their next sync
+        self.assertIn(('expenses.expense', self.expense.pk, 'delete'), ops(sync(self.member, since)))
+
+    def test_delete_user_with_notes(self):
+        self.owner.delete()
+
+        self.assertFalse(User.objects.filter(pk=self.owner.pk).exists())
+        self.assertFalse(Change.objects.filter(user_id=self.owner.pk).exists())
+
+
+class MembershipSyncTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'pw')
+        self.joiner = User.objects.create_user('joiner', 'joiner@example.com', 'pw')
+        self.family = Family.objects.create(name='Home', owner=self.owner)
+        FamilyMember.objects.create(family=self.family, user=self.owner)
+        self.expense = Expense.objects.create(user=self.owner, family=self.family, amount='10.00', date=date(2026, 1, 1))
+        # Something of their own so that `next_since` moves past the family's entries
+        Note.objects.create(user=self.joiner, title='Note')
+
+    def test_joiner_receives_existing_family_rows(self):
+        since = sync(self.joiner)['next_since']
+        FamilyMember.objects.create(family=self.family, user=self.joiner)
+
+        self.assertEqual(ops(sync(self.joiner, since)), [('expenses.expense', self.expense.pk, 'upsert')])
+
+    def test_leaver_receives_tombstones(self):
+        membership = FamilyMember.objects.create(family=self.family, user=self.joiner)
+        since = sync(self.joiner)['next_since']
+        membership.delete()
+
+        self.assertEqual(ops(sync(self.joiner, since)), [('expenses.expense', self.expense.pk, 'delete')])
+
+    def test_moving_an_expense_tombstones_the_old_scope(self):
+        since = sync(self.owner)['next_since']
+        other = Family.objects.create(name='Work', owner=self.joiner)
+        FamilyMember.objects.create(family=other, user=self.joiner)
+        self.expense.family = other
+        self.expense.save()
+
+        self.assertEqual(ops(sync(self.owner, since)), [('expenses.expense', self.expense.pk, 'delete')])
+        self.assertIn(('expenses.expense', self.expense.pk, 'upsert'), ops(sync(self.joiner)))
@@ -0,0 +1,149 @@
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from attendance.models import Attendance
+from expenses.models import Expense
+from families.models import Family, FamilyMember
+from notes.models import Note
+from udhar.models import Repayment, Udhar
+from .models import Change
+
+# pg_advisory_xact_lock key serializing change-log writers on PostgreSQL. It
+# is global rather than per family: a client's feed merges its own scope with
+# every family it is in, ordered by id, so ids have to commit in order across
+# scopes too. A write to the user's scope committing a higher id before a
+# family write with a lower one would otherwise be skipped past by a cursor.
+CHANGE_LOG_LOCK = 0x5359_4E43
+
+
+def _user_scope(instance):
+    return {'user_id': instance.user_id}
+
+def _expense_scope(expense):
+    # Expenses are listed to every member of their family
+    if expense.family_id:
+        return {'family_id': expense.family_id}
+    return {'user_id': expense.user_id}
+
+SCOPES = {
+    Note: _user_scope,
+    Attendance: _user_scope,
+    Udhar: _user_scope,
+    Expense: _expense_scope,
+}
+
+
+def _scope_key(entry):
+    return (entry.model, entry.user_id, entry.family_id)
+
+def write_entries(entries):
+    """
+    Append `entries` to the log, replacing older entries for the same objects
+    in the same scope. Entries of other scopes are left alone: a user's own
+    copy of a family's row (see record_membership) must not hide the family's
+    entry from the other members.
+    """
+    if not entries:
+        return
+    ids_by_scope = defaultdict(list)
+    for entry in entries:
+        ids_by_scope[_scope_key(entry)].append(entry.object_id)
+
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # Sequence values are handed out before commit, so concurrent writers
+            # could commit ids out of order and a client syncing `since` an id
+            # would skip the late one. Holding this lock until commit keeps ids
+            # in commit order (SQLite already has a single writer).
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_xact_lock(%s)', [CHANGE_LOG_LOCK])
+        for (label, user_id, family_id), ids in ids_by_scope.items():
+            Change.objects.filter(model=label, object_id__in=ids, user_id=user_id, family_id=family_id).delete()
+        Change.objects.bulk_create(entries)
+
+
+def record_changes(instances, op=Change.UPSERT):
+    """
+    Append change-log entries for `instances`, replacing any older entries for
+    the same objects. Used by the signal receivers below and by bulk write paths
+    (bulk_create/update) that bypass model signals.
+    """
+    write_entries([
+        Change(model=instance._meta.label_lower, object_id=instance.pk, op=op, **SCOPES[type(instance)](instance))
+        for instance in instances
+    ])
+
+def record_membership(family_id, user_ids, op):
+    """
+    Give users who joined (op=UPSERT) or left (op=DELETE) a family their own
+    entries for every object in the family's log. Joiners have usually synced
+    past the family's existing entries, and leavers no longer see the family
+    scope, so neither would otherwise learn about those rows.
+    """
+    log = Change.objects.filter(family_id=family_id)
+    if op == Change.UPSERT:
+        log = log.filter(op=Change.UPSERT)
+    # A leaver needs tombstones for rows deleted along with the family too
+    rows = list(log.values_list('model', 'object_id'))
+    write_entries([
+        Change(model=label, object_id=object_id, op=op, user_id=user_id)
+        for user_id in user_ids
+        for label, object_id in rows
+    ])
+
+
+@receiver(pre_save, sender=Expense)
+def remember_expense_scope(sender, instance, update_fields=None, **kwargs):
+    if instance.pk is None or (update_fields is not None and 'family' not in update_fields):
+        return
+    previous = Expense.objects.filter(pk=instance.pk).values('user_id', 'family_id').first()
+    if previous is not None:
+        instance._sync_previous_scope = _expense_scope(Expense(**previous))
+
+@receiver(post_save, sender=Note)
+@receiver(post_save, sender=Attendance)
+@receiver(post_save, sender=Expense)
+@receiver(post_save, sender=Udhar)
+def record_upsert(sender, instance, **kwargs):
+    previous = getattr(instance, '_sync_previous_scope', None)
+    if previous is not None and previous != SCOPES[sender](instance):
+        # Moved to another family (or out of one): the old scope gets a tombstone
+        write_entries([Change(model=instance._meta.label_lower, object_id=instance.pk, op=Change.DELETE, **previous)])
+    record_changes([instance], Change.UPSERT)
+
+@receiver(post_delete, sender=Note)
+@receiver(post_delete, sender=Attendance)
+@receiver(post_delete, sender=Expense)
+@receiver(post_delete, sender=Udhar)
+def record_delete(sender, instance, **kwargs):
+    record_changes([instance], Change.DELETE)
+
+@receiver(post_save, sender=Repayment)
+@receiver(post_delete, sender=Repayment)
+def record_repayment(sender, instance, **kwargs):
+    # Repayments are nested in the udhar payload, so they sync as an upsert of the parent
+    udhar = Udhar.objects.filter(pk=instance.udhar_id).only('id', 'user_id').first()
+    if udhar is not None:
+        record_changes([udhar], Change.UPSERT)
+
+@receiver(post_save, sender=FamilyMember)
+def record_join(sender, instance, created, **kwargs):
+    if created:
+        record_membership(instance.family_id, [instance.user_id], Change.UPSERT)
+
+@receiver(post_delete, sender=FamilyMember)
+def record_leave(sender, instance, **kwargs):
+    record_membership(instance.family_id, [instance.user_id], Change.DELETE)
+
+@receiver(post_delete, sender=Family)
+@receiver(post_delete, sender=User)
+def drop_scope_log(sender, instance, **kwargs):
+    # The scope columns have no FK constraint, so that tombstones written while
+    # a user or family is being deleted don't fail the commit. Nobody can read
+    # these entries any more; the members already got their own tombstones.
+    scope = 'family_id' if sender is Family else 'user_id'
+    Change.objects.filter(**{scope: instance.pk}).delete()
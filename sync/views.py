@@ -0,0 +1,89 @@
+from django.db.models import Q
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from attendance.models import Attendance
+from attendance.serializers import AttendanceSerializer
+from expenses.models import Expense
+from expenses.serializers import ExpenseSerializer
+from families.models import FamilyMember
+from notes.models import Note
+from notes.serializers import NoteSerializer
+from udhar.models import Udhar
+from udhar.serializers import UdharSerializer
+from .models import Change
+
+# model label -> (queryset used to load upserted rows, serializer)
+SYNCED_MODELS = {
+    'notes.note': (Note.objects.all(), NoteSerializer),
+    'attendance.attendance': (Attendance.objects.all(), AttendanceSerializer),
+    'expenses.expense': (Expense.objects.select_related('user'), ExpenseSerializer),
+    'udhar.udhar': (Udhar.objects.prefetch_related('repayments'), UdharSerializer),
+}
+
+class SyncView(APIView):
+    """
+    Incremental sync across notes, attendance, expenses and udhar.
+
+    GET /api/sync/?since=<seq>&limit=<n> returns every change with a sequence
+    greater than `since`, oldest first. Upserts carry the current object,
+    deletes are tombstones. Clients store `next_since` and keep calling while
+    `has_more` is true; `since=0` performs a full download.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 500
+    max_limit = 1000
+
+    def get(self, request):
+        try:
+            since = int(request.query_params.get('since', 0))
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            return Response({'detail': 'since and limit must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+        if since < 0 or limit < 1:
+            return Response({'detail': 'since must be >= 0 and limit >= 1.'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(limit, self.max_limit)
+
+        user = request.user
+        family_ids = FamilyMember.objects.filter(user=user).values('family_id')
+        changes = list(
+            Change.objects
+            .filter(Q(user=user) | Q(family_id__in=family_ids), id__gt=since)
+            .order_by('id')[:limit + 1]
+        )
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        payloads = self.load_payloads(changes)
+        results = []
+        for change in changes:
+            entry = {'seq': change.pk, 'model': change.model, 'id': change.object_id, 'op': change.op}
+            if change.op == Change.UPSERT:
+                data = payloads.get((change.model, change.object_id))
+                if data is None:
+                    # Deleted after this entry was read; its tombstone follows
+                    continue
+                entry['data'] = data
+            results.append(entry)
+
+        return Response({
+            'changes': results,
+            'next_since': changes[-1].pk if changes else since,
+            'has_more': has_more,
+        })
+
+    def load_payloads(self, changes):
+        ids_by_model = {}
+        for change in changes:
+            if change.op == Change.UPSERT:
+                ids_by_model.setdefault(change.model, []).append(change.object_id)
+
+        payloads = {}
+        for label, ids in ids_by_model.items():
+            queryset, serializer_class = SYNCED_MODELS[label]
+            objects = queryset.filter(pk__in=ids)
+            data = serializer_class(objects, many=True, context={'request': self.request}).data
+            for item in data:
+                payloads[(label, item['id'])] = item
+        return payloads
@@ -0,0 +1,18 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Task
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'max_attempts', 'run_at', 'finished_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'last_error')
+    readonly_fields = ('created_at', 'locked_by', 'locked_at', 'finished_at', 'last_error')
+    actions = ['requeue']
+
+    @admin.action(description="Requeue selected tasks")
+    def requeue(self, request, queryset):
+        count = queryset.exclude(status='running').update(
+            status='queued', attempts=0, run_at=timezone.now(), locked_by='', locked_at=None,
+        )
+        self.message_user(request, f"{count} task(s) requeued.")
@@ -0,0 +1,37 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from taskqueue.registry import TASKS
+from taskqueue.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Run background tasks from the task queue. Stops gracefully on SIGINT/SIGTERM."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=2,
+                            help="Number of worker threads.")
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help="Seconds to wait before polling an empty queue again.")
+        parser.add_argument('--burst', action='store_true',
+                            help="Exit once no due tasks are left.")
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            concurrency=options['concurrency'],
+            poll_interval=options['poll_interval'],
+            burst=options['burst'],
+        )
+
+        def shutdown(signum, frame):
+            self.stdout.write("Finishing running tasks before exiting...")
+            worker.stop()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        self.stdout.write(f"Worker {worker.name} started with {worker.concurrency} thread(s), "
+                          f"{len(TASKS)} registered task(s).")
+        worker.run()
+        self.stdout.write(self.style.SUCCESS("Worker stopped."))
@@ -0,0 +1,88 @@
+"""
+Task registration and enqueueing.
+
+    from taskqueue.registry import task
+
+    @task(max_attempts=3)
+    def send_welcome_email(user_id):
+        ...
+
+    send_welcome_email.enqueue(user.id)
+
+Arguments are stored as JSON, so pass ids rather than model instances. The
+Task row is written in the caller's transaction, so a task enqueued inside
+a transaction that rolls back is never run.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+class RegisteredTask:
+    def __init__(self, func, name, max_attempts):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, *args, delay=None, **kwargs):
+        """Queue a call to this task; `delay` (seconds) postpones it."""
+        if settings.TASKQUEUE_EAGER:
+            self.func(*args, **kwargs)
+            return None
+        run_at = timezone.now() + timedelta(seconds=delay or 0)
+        return Task.objects.create(
+            name=self.name, args=list(args), kwargs=kwargs,
+            run_at=run_at, max_attempts=self.max_attempts,
+        )
+
+    def enqueue_many(self, calls, batch_size=500):
+        """
+        Queue one call per (args, kwargs) pair in `calls` with batched
+        INSERTs. Returns the number of tasks queued.
+        """
+        count = 0
+        batch = []
+        for args, kwargs in calls:
+            if settings.TASKQUEUE_EAGER:
+                self.func(*args, **kwargs)
+            else:
+                batch.append(Task(name=self.name, args=list(args), kwargs=kwargs, max_attempts=self.max_attempts))
+            count += 1
+            if len(batch) >= batch_size:
+                Task.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Task.objects.bulk_create(batch)
+        return count
+
+def task(func=None, *, name=None, max_attempts=None):
+    """
+    Register `func` as a background task, adding `func.enqueue(...)`.
+    Tasks are registered under their dotted path unless `name` is given.
+    """
+    def register(func):
+        task_name = name or f'{func.__module__}.{func.__qualname__}'
+        if task_name in TASKS:
+            raise ValueError(f"Task {task_name!r} is already registered.")
+        attempts = max_attempts or settings.TASKQUEUE_MAX_ATTEMPTS
+        TASKS[task_name] = RegisteredTask(func, task_name, attempts)
+        return TASKS[task_name]
+
+    return register(func) if func is not None else register
+
+
+def retry_delay(attempts):
+    """Exponential backoff in seconds after the `attempts`-th failure."""
+    return settings.TASKQUEUE_RETRY_BACKOFF * 2 ** (attempts - 1)
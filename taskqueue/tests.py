@@ -0,0 +1,131 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Task
+from .registry import task
+from .worker import Worker
+
+CALLS = []
+
+
+@task(name='taskqueue.tests.record')
+def record(value):
+    CALLS.append(value)
+
+@task(name='taskqueue.tests.fail')
+def fail():
+    raise RuntimeError("boom")
+
+
+class WorkerTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+        self.worker = Worker()
+
+    def run_next(self):
+        claimed = self.worker.claim('host:1/0')
+        # Every outcome is logged: done at INFO, retry at WARNING, dead at ERROR
+        with self.assertLogs('taskqueue.worker'):
+            self.worker.execute(claimed)
+        claimed.refresh_from_db()
+        return claimed
+
+    def make_due(self, queued):
+        Task.objects.filter(pk=queued.pk).update(run_at=timezone.now())
+
+    def test_claims_the_next_due_task_once(self):
+        later = record.enqueue('later', delay=60)
+        first = record.enqueue('first')
+        second = record.enqueue('second')
+
+        claimed = self.worker.claim('host:1/0')
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertEqual((claimed.status, claimed.attempts, claimed.locked_by), ('running', 1, 'host:1/0'))
+        self.assertEqual(self.worker.claim('host:1/1').pk, second.pk)
+        # Running tasks and tasks that aren't due are left alone
+        self.assertIsNone(self.worker.claim('host:1/0'))
+        self.assertEqual(Task.objects.get(pk=later.pk).status, 'queued')
+
+    def test_success(self):
+        record.enqueue('hello')
+        finished = self.run_next()
+        self.assertEqual(CALLS, ['hello'])
+        self.assertEqual(finished.status, 'done')
+        self.assertIsNotNone(finished.finished_at)
+
+    def test_failure_is_retried_with_backoff(self):
+        queued = fail.enqueue()
+        for attempt, delay in ((1, settings.TASKQUEUE_RETRY_BACKOFF), (2, settings.TASKQUEUE_RETRY_BACKOFF * 2)):
+            before = timezone.now()
+            retried = self.run_next()
+            self.assertEqual((retried.status, retried.attempts, retried.locked_by), ('queued', attempt, ''))
+            self.assertIn("boom", retried.last_error)
+            self.assertGreaterEqual(retried.run_at, before + timedelta(seconds=delay))
+            self.assertLess(retried.run_at, before + timedelta(seconds=delay + 5))
+            # Not claimable until the backoff has passed
+            self.assertIsNone(self.worker.claim('host:1/0'))
+            self.make_due(queued)
+
+    def test_dead_after_max_attempts(self):
+        queued = fail.enqueue()
+        self.assertEqual(queued.max_attempts, settings.TASKQUEUE_MAX_ATTEMPTS)
+        for _ in range(settings.TASKQUEUE_MAX_ATTEMPTS - 1):
+            self.assertEqual(self.run_next().status, 'queued')
+            self.make_due(queued)
+
+        dead = self.run_next()
+        self.assertEqual((dead.status, dead.attempts), ('dead', settings.TASKQUEUE_MAX_ATTEMPTS))
+        self.assertIsNone(self.worker.claim('host:1/0'))
+
+    def test_unknown_task_is_dead_at_once(self):
+        Task.objects.create(name='taskqueue.tests.missing', max_attempts=3)
+        dead = self.run_next()
+        self.assertEqual(dead.status, 'dead')
+        self.assertIn("No task registered", dead.last_error)
+
+    @override_settings(TASKQUEUE_EAGER=True)
+    def test_eager_mode_runs_inline(self):
+        self.assertIsNone(record.enqueue('now'))
+        self.assertEqual(record.enqueue_many([(('a',), {}), (('b',), {})]), 2)
+        self.assertEqual(CALLS, ['now', 'a', 'b'])
+        self.assertFalse(Task.objects.exists())
+
+
+class HousekeepingTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.abandoned_at = self.now - timedelta(seconds=settings.TASKQUEUE_LOCK_TIMEOUT + 1)
+
+    def running(self, locked_at, attempts=1, max_attempts=3):
+        return Task.objects.create(
+            name='taskqueue.tests.record', status='running', locked_by='gone:1/0', locked_at=locked_at,
+            attempts=attempts, max_attempts=max_attempts,
+        )
+
+    def test_abandoned_tasks_are_reclaimed(self):
+        abandoned = self.running(self.abandoned_at)
+        exhausted = self.running(self.abandoned_at, attempts=3)
+        busy = self.running(self.now - timedelta(seconds=settings.TASKQUEUE_LOCK_TIMEOUT - 60))
+
+        with self.assertLogs('taskqueue.worker', 'WARNING'):
+            Worker().housekeeping()
+
+        abandoned.refresh_from_db()
+        self.assertEqual((abandoned.status, abandoned.locked_by, abandoned.locked_at), ('queued', '', None))
+        self.assertEqual(Worker().claim('host:1/0').pk, abandoned.pk)
+        self.assertEqual(Task.objects.get(pk=exhausted.pk).status, 'dead')
+        self.assertEqual(Task.objects.get(pk=busy.pk).status, 'running')
+
+    def test_old_finished_tasks_are_dropped(self):
+        kept_for = timedelta(days=settings.TASKQUEUE_KEEP_DONE_DAYS)
+        old = Task.objects.create(name='taskqueue.tests.record', status='done', finished_at=self.now - kept_for * 2)
+        recent = Task.objects.create(name='taskqueue.tests.record', status='done', finished_at=self.now)
+        dead = Task.objects.create(name='taskqueue.tests.record', status='dead', finished_at=self.now - kept_for * 2)
+
+        Worker().housekeeping()
+
+        self.assertEqual(set(Task.objects.values_list('pk', flat=True)), {recent.pk, dead.pk})
+        self.assertFalse(Task.objects.filter(pk=old.pk).exists())
@@ -0,0 +1,152 @@
+"""
+The worker behind `manage.py runworker`.
+
+Each worker thread claims one due task at a time. On PostgreSQL the claim
+is a `SELECT ... FOR UPDATE SKIP LOCKED`, so concurrent workers never wait
+on each other's rows. SQLite has no row locks; there a task is claimed with
+a compare-and-set UPDATE on its status, and a worker that loses the race
+simply tries the next candidate.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import OperationalError, close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from self_manager_backend.performance import format_fields, track
+from .models import Task
+from .registry import TASKS, retry_delay
+
+logger = logging.getLogger(__name__)
+
+# Due tasks a SQLite worker tries to claim before going back to sleep
+CLAIM_CANDIDATES = 10
+HOUSEKEEPING_INTERVAL = 60
+
+
+class Worker:
+    def __init__(self, concurrency=1, poll_interval=1.0, burst=False):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        # Exit once the queue is empty instead of polling forever
+        self.burst = burst
+        self.name = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = threading.Event()
+
+    def stop(self):
+        self.stopping.set()
+
+    # Claiming
+
+    def claim(self, thread_name):
+        now = timezone.now()
+        due = Task.objects.filter(status='queued', run_at__lte=now).order_by('run_at', 'id')
+        claimed = {
+            'status': 'running',
+            'locked_by': thread_name,
+            'locked_at': now,
+            'attempts': F('attempts') + 1,
+        }
+
+        if connection.features.has_select_for_update_skip_locked:
+            with transaction.atomic():
+                pk = due.select_for_update(skip_locked=True).values_list('pk', flat=True).first()
+                if pk is None:
+                    return None
+                Task.objects.filter(pk=pk).update(**claimed)
+            return Task.objects.get(pk=pk)
+
+        for pk in due.values_list('pk', flat=True)[:CLAIM_CANDIDATES]:
+            if Task.objects.filter(pk=pk, status='queued').update(**claimed):
+                return Task.objects.get(pk=pk)
+        return None
+
+    # Running
+
+    def execute(self, task):
+        registered = TASKS.get(task.name)
+        owned = Task.objects.filter(pk=task.pk, locked_by=task.locked_by)
+        try:
+            if registered is None:
+                raise LookupError(f"No task registered as {task.name!r}.")
+            with track() as metrics:
+                registered.func(*task.args, **task.kwargs)
+            logger.info("task %s", format_fields({'name': task.name, 'id': task.pk, **metrics.fields()}))
+        except Exception:
+            error = traceback.format_exc()
+            if registered is not None and task.attempts < task.max_attempts:
+                delay = retry_delay(task.attempts)
+                logger.warning("Task %s #%s failed (attempt %s/%s), retrying in %ss",
+                               task.name, task.pk, task.attempts, task.max_attempts, delay)
+                owned.update(status='queued', run_at=timezone.now() + timedelta(seconds=delay),
+                             locked_by='', locked_at=None, last_error=error)
+            else:
+                logger.error("Task %s #%s is dead after %s attempt(s)", task.name, task.pk, task.attempts)
+                owned.update(status='dead', finished_at=timezone.now(), last_error=error)
+        else:
+            owned.update(status='done', finished_at=timezone.now(), last_error='')
+
+    def run_thread(self, index):
+        thread_name = f'{self.name}/{index}'
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                try:
+                    task = self.claim(thread_name)
+                except OperationalError as e:
+                    # e.g. "database is locked" on SQLite under write contention
+                    logger.warning("Could not claim a task: %s", e)
+                    task = None
+                if task is not None:
+                    self.execute(task)
+                    continue
+                if self.burst:
+                    return
+                self.stopping.wait(self.poll_interval)
+        finally:
+            connection.close()
+
+    # Housekeeping
+
+    def housekeeping(self):
+        """
+        Requeue tasks whose worker died mid-run (or mark them dead if out of
+        attempts) and drop finished tasks past the retention window.
+        """
+        now = timezone.now()
+        stale = Task.objects.filter(
+            status='running', locked_at__lt=now - timedelta(seconds=settings.TASKQUEUE_LOCK_TIMEOUT))
+        stale.filter(attempts__gte=F('max_attempts')).update(
+            status='dead', finished_at=now, last_error='Worker stopped while running the task.')
+        requeued = stale.update(status='queued', run_at=now, locked_by='', locked_at=None)
+        if requeued:
+            logger.warning("Requeued %s task(s) abandoned by a stopped worker", requeued)
+        Task.objects.filter(
+            status='done', finished_at__lt=now - timedelta(days=settings.TASKQUEUE_KEEP_DONE_DAYS),
+        ).delete()
+
+    def run(self):
+        threads = [
+            threading.Thread(target=self.run_thread, args=(index,), name=f'taskqueue-worker-{index}')
+            for index in range(self.concurrency)
+        ]
+        self.housekeeping()
+        for thread in threads:
+            thread.start()
+
+        last_housekeeping = timezone.now()
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(1)
+            if (timezone.now() - last_housekeeping).total_seconds() >= HOUSEKEEPING_INTERVAL:
+                self.housekeeping()
+                last_housekeeping = timezone.now()
+        for thread in threads:
+            thread.join()
+        connection.close()
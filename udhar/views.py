@@ -1,10 +1,11 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from self_manager_backend.mixins import ConditionalListMixin
 from .models import Udhar, Repayment
 from .serializers import UdharSerializer, RepaymentSerializer
 
-class UdharViewSet(viewsets.ModelViewSet):
+class UdharViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     serializer_class = UdharSerializer
 
     def get_queryset(self):
@@ -19,6 +20,8 @@ class UdharViewSet(viewsets.ModelViewSet):
         serializer = RepaymentSerializer(data=request.data)
         if serializer.is_valid():
             serializer.save(udhar=udhar)
+            # Repayments are nested in the udhar payload, so bump its updated_at
+            udhar.save(update_fields=['updated_at'])
             
             # Check if fully paid (ignoring interest for simple closure check)
             total_paid = sum(r.amount for r in udhar.repayments.all())
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        # Connect the bootstrap and authentication cache invalidation receivers
+        from . import authentication, bootstrap  # noqa: F401
@@ -0,0 +1,73 @@
+from django.contrib.auth.models import User
+from django.db.models import F
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import Profile
+
+# Profile.auth_version when the token was issued; tokens without it predate the claim
+AUTH_VERSION_CLAIM = 'auth_version'
+
+
+class VersionedRefreshToken(RefreshToken):
+    """RefreshToken carrying the user's auth version; access tokens minted from it inherit the claim."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[AUTH_VERSION_CLAIM] = (
+            Profile.objects.filter(user_id=user.pk).values_list('auth_version', flat=True).first() or 0
+        )
+        return token
+
+
+class ProfileJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that loads the token's user with its profile joined, in
+    one query, and rejects deactivated accounts, accounts scheduled for
+    deletion and tokens issued before the user's current auth version (bumped
+    on password change).
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = (
+                self.user_model.objects
+                .select_related('profile')
+                .get(**{api_settings.USER_ID_FIELD: user_id})
+            )
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        profile = getattr(user, 'profile', None)
+        if profile is not None and profile.is_deleted:
+            raise AuthenticationFailed(_("Account is scheduled for deletion"), code="user_deleted")
+        if validated_token.get(AUTH_VERSION_CLAIM, 0) != (profile.auth_version if profile else 0):
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_on_password_change(sender, instance, created, **kwargs):
+    # set_password() leaves the raw password on the instance until save() finishes
+    if not created and instance._password is not None:
+        Profile.objects.filter(user_id=instance.pk).update(auth_version=F('auth_version') + 1)
@@ -0,0 +1,184 @@
+"""
+Home-screen bootstrap payload: everything the app needs on launch in one
+response, built from a fixed number of queries and cached per user for a
+short time.
+
+The cache key carries a version number for the user and one for each of
+their families. A write bumps the version of the user or family it
+affects, so invalidating a family doesn't need to look up its members.
+
+Payloads and versions both live in the per-process default cache, so a
+bump only reaches the worker that made the write: other workers may serve
+a payload up to BOOTSTRAP_CACHE_TIMEOUT old. Keeping the versions in the
+shared cache would add several queries to every write that bumps one
+(each chat message, note, expense, ...), which a 30 second home screen
+doesn't need.
+"""
+import hashlib
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, Substr
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from chat.models import Message, MessageReadStatus
+from expenses.models import Expense
+from families.models import Family, FamilyMember, JoinRequest
+from families.serializers import FamilyListSerializer, JoinRequestSerializer
+from notes.models import Note
+from notes.serializers import NotePreviewSerializer
+from notes.views import NOTE_PREVIEW_LENGTH
+from udhar.models import Repayment, Udhar
+from .models import Profile
+from .serializers import UserSerializer
+
+# Also the most a payload can lag behind writes handled by another worker
+BOOTSTRAP_CACHE_TIMEOUT = 30
+
+
+def user_version_key(user_id):
+    return f'bootstrap:version:user:{user_id}'
+
+def family_version_key(family_id):
+    return f'bootstrap:version:family:{family_id}'
+
+def bootstrap_cache_key(user_id, family_ids):
+    version_keys = [user_version_key(user_id), *(family_version_key(family_id) for family_id in sorted(family_ids))]
+    versions = cache.get_many(version_keys)
+    for key in version_keys:
+        if key not in versions:
+            # First use, or evicted: any fresh value leaves older payloads unreachable
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    digest = hashlib.md5(','.join(f'{key}={versions[key]}' for key in version_keys).encode()).hexdigest()
+    return f'bootstrap:{user_id}:{digest}'
+
+def get_bootstrap(user, request):
+    family_ids = Family.objects.for_user(user).values_list('pk', flat=True)
+    key = bootstrap_cache_key(user.pk, family_ids)
+    data = cache.get(key)
+    if data is None:
+        data = build_bootstrap(user, request)
+        cache.set(key, data, BOOTSTRAP_CACHE_TIMEOUT)
+    return data
+
+def build_bootstrap(user, request):
+    today = timezone.localdate()
+    month_start = today.replace(day=1)
+    next_month_start = date(today.year + 1, 1, 1) if today.month == 12 else date(today.year, today.month + 1, 1)
+    context = {'request': request}
+
+    families = Family.objects.for_user(user).with_summary(user)
+    pending_requests = (
+        JoinRequest.objects
+        .filter(family__owner=user, status='pending')
+        .select_related('user', 'family')
+        .order_by('created_at')
+    )
+    month_expenses = (
+        Expense.objects
+        .filter(family__members=user, date__gte=month_start, date__lt=next_month_start)
+        .aggregate(total=Coalesce(Sum('amount'), Decimal('0')), count=Count('pk'))
+    )
+
+    udhar = {kind: {'count': 0, 'amount': Decimal('0'), 'repaid': Decimal('0')} for kind, _ in Udhar.TYPE_CHOICES}
+    open_udhars = Udhar.objects.filter(user=user, is_closed=False)
+    for row in open_udhars.values('type').annotate(count=Count('pk'), amount=Sum('amount')).order_by():
+        udhar[row['type']].update(count=row['count'], amount=row['amount'])
+    repaid = (
+        Repayment.objects
+        .filter(udhar__in=open_udhars)
+        .values('udhar__type')
+        .annotate(amount=Sum('amount'))
+        .order_by()
+    )
+    for row in repaid:
+        udhar[row['udhar__type']]['repaid'] = row['amount']
+    for totals in udhar.values():
+        totals['balance'] = totals['amount'] - totals['repaid']
+
+    pinned_notes = (
+        Note.objects
+        .filter(user=user, is_pinned=True)
+        .only('id', 'title', 'color_id', 'is_pinned', 'updated_at')
+        .annotate(preview=Substr('content', 1, NOTE_PREVIEW_LENGTH))
+        .order_by('-updated_at')
+    )
+
+    return {
+        'user': UserSerializer(user).data,
+        'families': FamilyListSerializer(families, many=True, context=context).data,
+        'pending_join_requests': JoinRequestSerializer(pending_requests, many=True).data,
+        'expenses': {
+            'month': month_start.strftime('%Y-%m'),
+            'total': month_expenses['total'],
+            'count': month_expenses['count'],
+        },
+        'udhar': udhar,
+        'pinned_notes': NotePreviewSerializer(pinned_notes, many=True).data,
+    }
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Not cached, so no payload uses it; the next read starts a fresh one
+        pass
+
+def invalidate_bootstrap(user_ids):
+    for user_id in set(user_ids):
+        if user_id:
+            _bump_version(user_version_key(user_id))
+
+def invalidate_family_bootstrap(family_id):
+    """Outdate the payload of every member (and the owner) of a family."""
+    _bump_version(family_version_key(family_id))
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_for_user(sender, instance, **kwargs):
+    invalidate_bootstrap([instance.pk])
+
+@receiver(post_save, sender=Profile)
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+@receiver(post_save, sender=Udhar)
+@receiver(post_delete, sender=Udhar)
+@receiver(post_save, sender=MessageReadStatus)
+def invalidate_for_owner(sender, instance, **kwargs):
+    invalidate_bootstrap([instance.user_id])
+
+@receiver(post_save, sender=Repayment)
+@receiver(post_delete, sender=Repayment)
+def invalidate_for_repayment(sender, instance, **kwargs):
+    invalidate_bootstrap(Udhar.objects.filter(pk=instance.udhar_id).values_list('user_id', flat=True))
+
+@receiver(post_save, sender=Family)
+@receiver(post_save, sender=JoinRequest)
+@receiver(post_delete, sender=JoinRequest)
+@receiver(post_save, sender=Message)
+@receiver(post_delete, sender=Message)
+def invalidate_for_family(sender, instance, **kwargs):
+    family_id = instance.pk if sender is Family else instance.family_id
+    invalidate_family_bootstrap(family_id)
+
+@receiver(post_save, sender=FamilyMember)
+@receiver(post_delete, sender=FamilyMember)
+def invalidate_for_membership(sender, instance, **kwargs):
+    invalidate_bootstrap([instance.user_id])
+    invalidate_family_bootstrap(instance.family_id)
+
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+def invalidate_for_expense(sender, instance, **kwargs):
+    if instance.family_id:
+        invalidate_family_bootstrap(instance.family_id)
+    else:
+        invalidate_bootstrap([instance.user_id])
@@ -0,0 +1,160 @@
+"""
+Personal data export: a zip of the user's notes, attendance, expenses (with
+images), udhar with repayments and sent chat messages (with images).
+
+The archive is produced incrementally from `.iterator()` querysets and
+chunked media reads, so neither the rows nor the archive are ever held in
+memory whole. Small accounts stream it straight into the response; large
+accounts get a background DataExport that writes the same stream to a file.
+"""
+import io
+import json
+import logging
+import tempfile
+import zipfile
+
+from django.conf import settings
+from django.core.files.base import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from attendance.models import Attendance
+from chat.models import Message
+from expenses.models import Expense
+from notes.models import Note
+from self_manager_backend.routers import read_alias, read_replica
+from udhar.models import Repayment, Udhar
+from .models import DataExport
+
+logger = logging.getLogger(__name__)
+
+ITERATOR_CHUNK_SIZE = 2000
+# Flush compressed output to the consumer once this much is buffered
+STREAM_CHUNK_SIZE = 64 * 1024
+MEDIA_READ_SIZE = 64 * 1024
+
+
+def export_sections(user, using=None):
+    """(archive name, queryset of dicts) for every table in the export."""
+    sections = [
+        ('notes.jsonl', Note.objects.filter(user=user).order_by('pk').values(
+            'id', 'title', 'content', 'color_id', 'is_pinned', 'created_at', 'updated_at')),
+        ('attendance.jsonl', Attendance.objects.filter(user=user).order_by('date').values(
+            'id', 'date', 'status', 'remark', 'updated_at')),
+        ('expenses.jsonl', Expense.objects.filter(user=user).order_by('pk').values(
+            'id', 'family_id', 'amount', 'category', 'date', 'description', 'items', 'image', 'uuid', 'updated_at')),
+        ('udhar.jsonl', Udhar.objects.filter(user=user).order_by('pk').values(
+            'id', 'person_name', 'amount', 'rate', 'date', 'due_date', 'reason', 'type', 'is_closed',
+            'created_at', 'updated_at')),
+        ('repayments.jsonl', Repayment.objects.filter(udhar__user=user).order_by('pk').values(
+            'id', 'udhar_id', 'amount', 'date', 'note', 'created_at')),
+        ('chat_messages.jsonl', Message.objects.filter(sender=user).order_by('pk').values(
+            'id', 'family_id', 'content', 'image', 'timestamp', 'message_type', 'is_deleted', 'is_edited',
+            'reply_to_id')),
+    ]
+    return [(name, queryset.using(using)) for name, queryset in sections]
+
+def export_media(user, using=None):
+    """Storage names of the media files referenced by the export."""
+    for queryset in (
+        Expense.objects.filter(user=user).exclude(image='').exclude(image__isnull=True),
+        Message.objects.filter(sender=user).exclude(image='').exclude(image__isnull=True),
+    ):
+        yield from queryset.using(using).order_by('pk').values_list('image', flat=True).iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+
+def export_row_count(user):
+    with read_replica(user):
+        return sum(queryset.count() for _, queryset in export_sections(user))
+
+
+class _ZipStream(io.RawIOBase):
+    """Write-only sink for ZipFile. Being unseekable makes ZipFile emit streaming data descriptors."""
+
+    def __init__(self):
+        self._chunks = []
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        self.size = 0
+        return data
+
+
+def iter_export(user):
+    """Yield the export zip as a sequence of byte chunks."""
+    # Streamed after the view has returned, so the alias is passed to the
+    # querysets explicitly rather than set with read_replica()
+    db = read_alias(user)
+    sink = _ZipStream()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        profile = {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'date_joined': user.date_joined,
+            'exported_at': timezone.now(),
+        }
+        archive.writestr('profile.json', json.dumps(profile, cls=DjangoJSONEncoder, indent=2))
+
+        for name, queryset in export_sections(user, using=db):
+            with archive.open(name, 'w', force_zip64=True) as entry:
+                for row in queryset.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+                    entry.write(json.dumps(row, cls=DjangoJSONEncoder).encode() + b'\n')
+                    if sink.size >= STREAM_CHUNK_SIZE:
+                        yield sink.drain()
+            yield sink.drain()
+
+        for media_name in export_media(user, using=db):
+            if not default_storage.exists(media_name):
+                continue
+            with default_storage.open(media_name, 'rb') as source, \
+                    archive.open(f'media/{media_name}', 'w', force_zip64=True) as entry:
+                for block in iter(lambda: source.read(MEDIA_READ_SIZE), b''):
+                    entry.write(block)
+                    if sink.size >= STREAM_CHUNK_SIZE:
+                        yield sink.drain()
+            yield sink.drain()
+    # Central directory, written when the archive is closed
+    yield sink.drain()
+
+
+def build_export_file(export_id):
+    """Write a DataExport's archive to storage. Runs outside the request."""
+    export = DataExport.objects.select_related('user').get(pk=export_id)
+    export.status = 'running'
+    export.save(update_fields=['status'])
+    try:
+        # Spooled through a temporary file so the archive never sits in memory
+        with tempfile.TemporaryFile(dir=settings.FILE_UPLOAD_TEMP_DIR) as tmp:
+            for chunk in iter_export(export.user):
+                tmp.write(chunk)
+            tmp.seek(0)
+            export.file.save('export.zip', File(tmp), save=False)
+        export.status = 'ready'
+    except Exception as e:
+        logger.exception("Data export %s failed", export_id)
+        export.status = 'failed'
+        export.error = str(e)
+    export.finished_at = timezone.now()
+    export.save(update_fields=['status', 'file', 'error', 'finished_at'])
+    return export
+
+def start_export(user):
+    """Create a DataExport for `user` and queue building it on the task queue."""
+    from .tasks import build_data_export
+
+    export = DataExport.objects.create(user=user)
+    build_data_export.enqueue(export.pk)
+    return export
@@ -0,0 +1,233 @@
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from attendance.models import Attendance
+from chat.models import Message, MessageReadStatus
+from expenses.models import Expense
+from families.models import Family, FamilyMember, JoinRequest
+from families.summaries import invalidate_family_summary
+from notes.models import Note
+from sync.models import Change
+from sync.tracking import record_changes
+from udhar.models import Repayment, Udhar
+from users.bootstrap import invalidate_family_bootstrap
+from users.models import DataExport, Profile
+
+
+class AccountRestored(Exception):
+    """The account was reactivated after the run selected it."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Permanently delete accounts that were soft-deleted more than the retention "
+        "window ago. Families they own pass to their oldest member, or are deleted "
+        "along with them when nobody else is in them. Data is removed in bounded "
+        "batches, each in its own transaction, so the command can be interrupted and "
+        "re-run to resume. Accounts reactivated while it runs are left alone."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ACCOUNT_PURGE_RETENTION_DAYS,
+                            help="Retention window in days (default: ACCOUNT_PURGE_RETENTION_DAYS).")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Rows deleted per transaction.")
+        parser.add_argument('--limit', type=int, default=None,
+                            help="Maximum number of accounts to purge in this run.")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only list the accounts that would be purged.")
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.cutoff = cutoff = timezone.now() - timedelta(days=options['days'])
+
+        # Served by the (is_deleted, deleted_at) index
+        expired = (
+            Profile.objects
+            .filter(is_deleted=True, deleted_at__lte=cutoff)
+            .order_by('deleted_at')
+            .values_list('user_id', flat=True)
+        )
+        if options['limit']:
+            expired = expired[:options['limit']]
+        user_ids = list(expired)
+
+        self.stdout.write(f"{len(user_ids)} account(s) deleted before {cutoff:%Y-%m-%d %H:%M} to purge.")
+        purged = 0
+        for user_id in user_ids:
+            if options['dry_run']:
+                for family, successor in self.owned_families(user_id):
+                    if successor:
+                        self.stdout.write(f"User {user_id}: would hand family {family.pk} to user {successor.user_id}.")
+                    else:
+                        self.stdout.write(f"User {user_id}: would delete family {family.pk}.")
+                self.stdout.write(f"User {user_id}: would be purged.")
+                continue
+            self.user_id = user_id
+            try:
+                self.release_families(user_id)
+                self.purge_user(user_id)
+            except AccountRestored:
+                self.stdout.write(self.style.WARNING(f"User {user_id}: reactivated, skipped."))
+                continue
+            purged += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} account(s)."))
+
+    def lock_account(self):
+        """
+        Lock the profile of the account being purged and check it is still
+        scheduled for deletion. Every purging transaction starts with this, so
+        a login that reactivates the account waits for the running batch and
+        the rest of the purge is abandoned.
+        """
+        still_expired = (
+            Profile.objects
+            .select_for_update()
+            .filter(user_id=self.user_id, is_deleted=True, deleted_at__lte=self.cutoff)
+            .values_list('pk', flat=True)
+        )
+        if not list(still_expired):
+            raise AccountRestored
+
+    def owned_families(self, user_id):
+        """(family, successor membership or None) for every family the user owns."""
+        for family in Family.objects.filter(owner_id=user_id).order_by('pk'):
+            successor = (
+                FamilyMember.objects.filter(family=family).exclude(user_id=user_id)
+                # Members who are waiting to be purged themselves come last
+                .order_by('user__profile__is_deleted', 'joined_at', 'pk')
+                .first()
+            )
+            yield family, successor
+
+    def release_families(self, user_id):
+        for family, successor in self.owned_families(user_id):
+            if successor:
+                with transaction.atomic():
+                    self.lock_account()
+                    family.owner_id = successor.user_id
+                    family.save()
+                self.stdout.write(f"User {user_id}: family {family.pk} handed to user {successor.user_id}.")
+            else:
+                self.purge_family(family)
+
+    def purge_family(self, family):
+        self.run_steps(f"Family {family.pk}", [
+            ('read statuses', MessageReadStatus.objects.filter(message__family_id=family.pk), None, None),
+            ('chat messages', Message.objects.filter(family_id=family.pk), 'image', self.detach_replies),
+            ('expenses', Expense.objects.filter(family_id=family.pk), 'image', None),
+            ('join requests', JoinRequest.objects.filter(family_id=family.pk), None, None),
+            ('memberships', FamilyMember.objects.filter(family_id=family.pk), None, None),
+            ('sync log', Change.objects.filter(family_id=family.pk), None, None),
+        ])
+        # Only the family row is left for the collector
+        with transaction.atomic():
+            self.lock_account()
+            family.delete()
+        self.stdout.write(f"Family {family.pk}: deleted.")
+
+    def purge_user(self, user_id):
+        self.run_steps(f"User {user_id}", [
+            ('read statuses', MessageReadStatus.objects.filter(user_id=user_id), None, None),
+            ('read statuses on their messages', MessageReadStatus.objects.filter(message__sender_id=user_id), None, None),
+            ('chat messages', Message.objects.filter(sender_id=user_id), 'image', self.delete_messages),
+            ('repayments', Repayment.objects.filter(udhar__user_id=user_id), None, None),
+            ('udhar', Udhar.objects.filter(user_id=user_id), None, None),
+            ('expenses', Expense.objects.filter(user_id=user_id), 'image', self.delete_expenses),
+            ('attendance', Attendance.objects.filter(user_id=user_id), None, None),
+            ('notes', Note.objects.filter(user_id=user_id), None, None),
+            ('join requests', JoinRequest.objects.filter(user_id=user_id), None, self.invalidate_families),
+            ('family memberships', FamilyMember.objects.filter(user_id=user_id), None, self.leave_families),
+            ('sync log', Change.objects.filter(user_id=user_id), None, None),
+            ('data exports', DataExport.objects.filter(user_id=user_id), 'file', None),
+        ])
+
+        # Only the user row and its one-to-one profile are left for the collector
+        with transaction.atomic():
+            self.lock_account()
+            User.objects.filter(pk=user_id).delete()
+        self.stdout.write(self.style.SUCCESS(f"User {user_id}: purged."))
+
+    def run_steps(self, owner, steps):
+        """Run (label, queryset, file field, batch hook) steps in order, reporting progress."""
+        for label, queryset, file_field, hook in steps:
+            total = queryset.count()
+            if not total:
+                continue
+            deleted = 0
+            for count in self.delete_in_batches(queryset, file_field, hook):
+                deleted += count
+                self.stdout.write(f"{owner}: {label} {deleted}/{total}")
+
+    def delete_in_batches(self, queryset, file_field=None, hook=None):
+        """
+        Delete `queryset` batch_size rows at a time, yielding the size of each
+        batch. Rows are deleted with a plain DELETE: the per-row signal
+        receivers (sync log, cache invalidation) would cost queries per row and
+        mostly concern the account being purged. `hook(batch)` does what other
+        users still need, once per batch and in the same transaction.
+        """
+        model = queryset.model
+        storage = model._meta.get_field(file_field).storage if file_field else None
+        while True:
+            ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:self.batch_size])
+            if not ids:
+                return
+            batch = model.objects.filter(pk__in=ids)
+            files = [name for name in batch.values_list(file_field, flat=True) if name] if file_field else []
+            with transaction.atomic():
+                self.lock_account()
+                if hook:
+                    hook(batch)
+                # The steps are ordered so nothing references these rows any more
+                self.delete_rows(model, ids)
+            # Media is removed only once the rows referencing it are gone
+            for name in files:
+                storage.delete(name)
+            yield len(ids)
+
+    def delete_rows(self, model, ids):
+        """
+        DELETE the rows with primary keys `ids` in one statement, without the
+        collector: no signals, and no cascades or SET_NULL handling.
+        """
+        connection = connections[router.db_for_write(model)]
+        quote = connection.ops.quote_name
+        placeholders = ', '.join(['%s'] * len(ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {quote(model._meta.db_table)} WHERE {quote(model._meta.pk.column)} IN ({placeholders})",
+                ids,
+            )
+
+    def family_ids(self, batch):
+        return set(batch.exclude(family_id=None).values_list('family_id', flat=True))
+
+    def detach_replies(self, batch):
+        # reply_to is SET_NULL, which a plain DELETE doesn't apply
+        Message.objects.filter(reply_to__in=batch).update(reply_to=None)
+
+    def invalidate_families(self, batch):
+        for family_id in self.family_ids(batch):
+            transaction.on_commit(partial(invalidate_family_bootstrap, family_id))
+
+    def delete_messages(self, batch):
+        self.detach_replies(batch)
+        self.invalidate_families(batch)
+
+    def delete_expenses(self, batch):
+        # The other members still sync the family's expenses
+        record_changes(batch.exclude(family_id=None).only('id', 'user_id', 'family_id'), Change.DELETE)
+        self.invalidate_families(batch)
+
+    def leave_families(self, batch):
+        for family_id in self.family_ids(batch):
+            transaction.on_commit(partial(invalidate_family_summary, family_id=family_id))
+        self.invalidate_families(batch)
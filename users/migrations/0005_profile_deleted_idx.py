@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-19 17:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_profile_deleted_at_profile_is_deleted'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['is_deleted', 'deleted_at'], name='profile_deleted_idx'),
+        ),
+    ]
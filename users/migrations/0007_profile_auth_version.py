@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 18:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_dataexport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='auth_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Bumped on password change; revokes older tokens'),
+        ),
+    ]
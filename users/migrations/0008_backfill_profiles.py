@@ -0,0 +1,28 @@
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+
+def backfill_profiles(apps, schema_editor):
+    """Give every account created before the profile receiver its profile."""
+    User = apps.get_model('auth', 'User')
+    Profile = apps.get_model('users', 'Profile')
+    missing = User.objects.filter(profile__isnull=True).order_by('pk').values_list('pk', flat=True)
+    profiles = []
+    for user_id in missing.iterator(chunk_size=BATCH_SIZE):
+        profiles.append(Profile(user_id=user_id))
+        if len(profiles) >= BATCH_SIZE:
+            Profile.objects.bulk_create(profiles)
+            profiles = []
+    Profile.objects.bulk_create(profiles)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_profile_auth_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_profiles, migrations.RunPython.noop),
+    ]
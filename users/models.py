@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
@@ -20,18 +22,44 @@ class Profile(models.Model):
     fcm_token = models.TextField(blank=True, null=True, help_text="Firebase Cloud Messaging Token for Push Notifications")
     is_deleted = models.BooleanField(default=False, help_text="Soft delete flag")
     deleted_at = models.DateTimeField(null=True, blank=True, help_text="Time of deletion request")
+    auth_version = models.PositiveIntegerField(default=0, editable=False, help_text="Bumped on password change; revokes older tokens")
+
+    class Meta:
+        indexes = [
+            # Lets purge_deleted_accounts find expired soft-deleted accounts
+            models.Index(fields=['is_deleted', 'deleted_at'], name='profile_deleted_idx'),
+        ]
 
     def __str__(self):
         return f'{self.user.username} Profile'
 
+def export_upload_to(instance, filename):
+    # Unguessable name; downloads still go through the authenticated endpoint
+    return f'exports/{uuid.uuid4().hex}.zip'
+
+class DataExport(models.Model):
+    """A personal data export archive built in the background for large accounts."""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    )
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='data_exports')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    file = models.FileField(upload_to=export_upload_to, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'Export {self.pk} for {self.user.username} ({self.status})'
+
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
+    # The profile is only written here when the user is created. Later user
+    # saves (e.g. last_login) leave it alone; profile changes are saved
+    # explicitly with update_fields where they happen. Accounts from before
+    # this receiver got theirs from migration 0008_backfill_profiles.
     if created:
         Profile.objects.create(user=instance)
-
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
-    else:
-        Profile.objects.create(user=instance)
@@ -4,6 +4,10 @@ from django.conf import settings
 import os
 import logging
 
+from analytics.rollups import record_pushes_delivered
+from self_manager_backend.metrics import observe_push
+from self_manager_backend.performance import timed
+
 logger = logging.getLogger(__name__)
 
 class NotificationManager:
@@ -75,7 +79,8 @@ class NotificationManager:
 
         try:
             # Try newer API
-            response = messaging.send_multicast(message)
+            with timed('fcm'):
+                response = messaging.send_multicast(message)
             
             # --- Success Path (if send_multicast works) ---
             logger.info(f'{response.success_count} messages were sent successfully')
@@ -88,6 +93,8 @@ class NotificationManager:
                         failed_tokens.append(valid_tokens[idx])
                         logger.error(f'Failure sending to {valid_tokens[idx]}: {resp.exception}')
             
+            record_pushes_delivered(response.success_count)
+            observe_push(response.success_count, response.failure_count)
             return {
                 "success_count": response.success_count,
                 "failure_count": response.failure_count,
@@ -109,13 +116,16 @@ class NotificationManager:
                         token=token,
                         android=android_config
                      )
-                     messaging.send(msg)
+                     with timed('fcm'):
+                         messaging.send(msg)
                      success_count += 1
                  except Exception as exc:
                      failure_count += 1
                      failed_tokens_list.append(token)
                      logger.error(f'Failure sending to {token}: {exc}')
-            
+
+             record_pushes_delivered(success_count)
+             observe_push(success_count, failure_count)
              return {
                  "success_count": success_count,
                  "failure_count": failure_count,
@@ -123,6 +133,7 @@ class NotificationManager:
              }
         except Exception as e:
             logger.error(f"Error sending multicast notification: {str(e)}")
+            observe_push(0, len(valid_tokens))
             return {
                 "success_count": 0,
                 "failure_count": len(valid_tokens),
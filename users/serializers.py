@@ -3,8 +3,11 @@ from django.contrib.auth.models import User
 from .models import OTPRequest
 import re
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .authentication import VersionedRefreshToken
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = VersionedRefreshToken
+
     def validate(self, attrs):
         data = super().validate(attrs)
         
@@ -13,7 +16,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         if hasattr(self.user, 'profile') and self.user.profile.is_deleted:
             self.user.profile.is_deleted = False
             self.user.profile.deleted_at = None
-            self.user.profile.save()
+            self.user.profile.save(update_fields=['is_deleted', 'deleted_at'])
             recovered = True
             
         data['recovered'] = recovered
@@ -49,10 +52,12 @@ class UserSerializer(serializers.ModelSerializer):
         profile_data = validated_data.pop('profile', {})
         phone_number = profile_data.get('phone_number')
         
-        # Update User fields
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
+        # Update User fields (only the ones that actually changed)
+        changed = [attr for attr, value in validated_data.items() if getattr(instance, attr) != value]
+        for attr in changed:
+            setattr(instance, attr, validated_data[attr])
+        if changed:
+            instance.save(update_fields=changed)
         
         # Update Profile fields
         if phone_number is not None:
@@ -61,8 +66,9 @@ class UserSerializer(serializers.ModelSerializer):
                  from .models import Profile
                  Profile.objects.create(user=instance)
             
-            instance.profile.phone_number = phone_number
-            instance.profile.save()
+            if instance.profile.phone_number != phone_number:
+                instance.profile.phone_number = phone_number
+                instance.profile.save(update_fields=['phone_number'])
             
         return instance
 
@@ -146,7 +152,7 @@ class ForgotPasswordSerializer(serializers.Serializer):
         
         user = User.objects.get(email=email)
         user.set_password(new_password)
-        user.save()
+        user.save(update_fields=['password'])
         
         # Invalidate OTP to prevent reuse
         OTPRequest.objects.filter(email=email, is_verified=True).delete()
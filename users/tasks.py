@@ -0,0 +1,46 @@
+"""
+Background tasks for the users app (run by `manage.py runworker`).
+"""
+from django.conf import settings
+from django.core.mail import send_mail
+
+from self_manager_backend.metrics import SMTP_SEND_LATENCY
+from self_manager_backend.performance import timed
+from taskqueue.registry import task
+from .export import build_export_file
+from .models import Profile
+from .notification_manager import NotificationManager
+
+# FCM accepts at most 500 tokens per multicast
+MULTICAST_BATCH_SIZE = 500
+
+
+# Retries are 30 s, 1 min and 2 min apart (TASKQUEUE_RETRY_BACKOFF doubling), so
+# the last attempt is made well within the 10 minutes an OTP stays valid
+@task(max_attempts=4)
+def send_email(recipient, subject, message, html_message=None):
+    """Send one email; failures raise so the task is retried."""
+    with timed('smtp'), SMTP_SEND_LATENCY.time():
+        send_mail(
+            subject=subject,
+            message=message,
+            from_email=settings.EMAIL_HOST_USER,
+            recipient_list=[recipient],
+            html_message=html_message,
+            fail_silently=False,
+        )
+
+@task(max_attempts=1)
+def broadcast_notification(title, body, data=None):
+    """Push a notification to every registered device."""
+    tokens = list(
+        Profile.objects.exclude(fcm_token__isnull=True).exclude(fcm_token__exact='')
+        .values_list('fcm_token', flat=True)
+    )
+    for start in range(0, len(tokens), MULTICAST_BATCH_SIZE):
+        NotificationManager.send_multicast_notification(tokens[start:start + MULTICAST_BATCH_SIZE], title, body, data)
+
+@task(max_attempts=1)
+def build_data_export(export_id):
+    # build_export_file records its own failure on the DataExport
+    build_export_file(export_id)
@@ -1,3 +1,230 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from importlib import import_module
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from chat.models import Message
+from expenses.models import Expense
+from families.models import Family, FamilyMember
+from notes.models import Note
+from sync.models import Change
+from taskqueue.registry import retry_delay
+from .authentication import VersionedRefreshToken
+from .management.commands.purge_deleted_accounts import Command as PurgeCommand
+from .models import OTPRequest, Profile
+from .tasks import send_email
+
+WRITE_VERBS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def write_queries(context):
+    """(verb, table) for every write statement captured by a CaptureQueriesContext."""
+    writes = []
+    for query in context.captured_queries:
+        sql = query['sql'].lstrip()
+        verb = sql.split(' ', 1)[0].upper()
+        if verb not in WRITE_VERBS:
+            continue
+        table = sql.split('"')[1] if '"' in sql else ''
+        writes.append((verb, table))
+    return writes
+
+
+class ProfileWriteTests(TestCase):
+    """Counts the write queries on the hot user paths to keep redundant profile saves out."""
+    password = 'Str0ng!Pass'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user('alice', 'alice@example.com', self.password)
+
+    def test_register_writes_user_and_profile_once(self):
+        OTPRequest.objects.create(email='bob@example.com', otp='1234567', is_verified=True)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post('/api/auth/register/', {
+                'username': 'bob',
+                'email': 'bob@example.com',
+                'password': self.password,
+                'first_name': 'Bobby',
+                'last_name': 'Tables',
+                'otp': '1234567',
+            })
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(write_queries(context), [
+            ('INSERT', 'auth_user'),
+            ('INSERT', 'users_profile'),
+        ])
+
+    def test_login_does_not_write_profile(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post('/api/auth/token/', {'username': 'alice', 'password': self.password})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertNotIn('users_profile', [table for _, table in write_queries(context)])
+
+    def test_login_reactivation_updates_profile_once(self):
+        self.user.profile.is_deleted = True
+        self.user.profile.save()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post('/api/auth/token/', {'username': 'alice', 'password': self.password})
+        self.assertTrue(response.json()['recovered'])
+        self.assertEqual(
+            [write for write in write_queries(context) if write[1] == 'users_profile'],
+            [('UPDATE', 'users_profile')],
+        )
+
+    def test_missing_profiles_are_backfilled(self):
+        Profile.objects.filter(user=self.user).delete()
+        backfill_profiles = import_module('users.migrations.0008_backfill_profiles').backfill_profiles
+        backfill_profiles(apps, None)
+        self.assertTrue(Profile.objects.filter(user=self.user).exists())
+
+    def test_me_update_only_writes_changed_rows(self):
+        self.client.force_authenticate(self.user)
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.patch('/api/users/me/', {'first_name': 'Alicia'}, format='json')
+        self.assertEqual(write_queries(context), [('UPDATE', 'auth_user')])
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.patch('/api/users/me/', {'phone_number': '9876543210'}, format='json')
+        self.assertEqual(write_queries(context), [('UPDATE', 'users_profile')])
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.patch('/api/users/me/', {'first_name': 'Alicia', 'phone_number': '9876543210'}, format='json')
+        self.assertEqual(write_queries(context), [])
+
+
+class ProfileJWTAuthenticationTests(TestCase):
+    password = 'Str0ng!Pass'
+
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', self.password)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {VersionedRefreshToken.for_user(self.user).access_token}')
+
+    def test_every_request_reads_the_current_row(self):
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+
+        # Queryset updates skip the model signals, like a write on another worker
+        Profile.objects.filter(user=self.user).update(phone_number='9876543210')
+        self.assertEqual(self.client.get('/api/users/me/').json()['phone_number'], '9876543210')
+
+        Profile.objects.filter(user=self.user).update(is_deleted=True)
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+        Profile.objects.filter(user=self.user).update(is_deleted=False)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+    def test_password_change_revokes_older_tokens(self):
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+
+        self.user.set_password('N3w!Password')
+        self.user.save(update_fields=['password'])
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {VersionedRefreshToken.for_user(self.user).access_token}')
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+
+
+class PurgeDeletedAccountsTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'pw')
+        self.member = User.objects.create_user('member', 'member@example.com', 'pw')
+        Profile.objects.filter(user=self.owner).update(is_deleted=True, deleted_at=timezone.now() - timedelta(days=60))
+
+    def purge(self):
+        call_command('purge_deleted_accounts', days=30, stdout=StringIO())
+
+    def test_owned_family_passes_to_the_oldest_member(self):
+        family = Family.objects.create(name='Home', owner=self.owner)
+        FamilyMember.objects.create(family=family, user=self.owner)
+        FamilyMember.objects.create(family=family, user=self.member)
+        FamilyMember.objects.create(family=family, user=User.objects.create_user('late'))
+        expense = Expense.objects.create(user=self.owner, family=family, amount='10.00', date=date(2026, 1, 1))
+
+        self.purge()
+
+        self.assertFalse(User.objects.filter(pk=self.owner.pk).exists())
+        family.refresh_from_db()
+        self.assertEqual(family.owner, self.member)
+        # The remaining members sync the removal of the purged user's expense
+        self.assertTrue(Change.objects.filter(
+            family=family, model='expenses.expense', object_id=expense.pk, op=Change.DELETE).exists())
+
+    def test_sole_member_family_is_deleted(self):
+        family = Family.objects.create(name='Solo', owner=self.owner)
+        FamilyMember.objects.create(family=family, user=self.owner)
+        Message.objects.create(family=family, sender=self.owner, content='Hi')
+
+        self.purge()
+
+        self.assertFalse(Family.objects.filter(pk=family.pk).exists())
+        self.assertFalse(User.objects.filter(pk=self.owner.pk).exists())
+
+    def test_account_reactivated_during_the_run_is_kept(self):
+        family = Family.objects.create(name='Home', owner=self.owner)
+        FamilyMember.objects.create(family=family, user=self.owner)
+        FamilyMember.objects.create(family=family, user=self.member)
+        Note.objects.bulk_create([Note(user=self.owner, title='Note') for _ in range(3)])
+        purge_user = PurgeCommand.purge_user
+
+        def log_in_midway(command, user_id):
+            # The owner logs in again after their family was handed over
+            Profile.objects.filter(user_id=user_id).update(is_deleted=False, deleted_at=None)
+            purge_user(command, user_id)
+
+        with mock.patch.object(PurgeCommand, 'purge_user', log_in_midway):
+            self.purge()
+
+        self.assertTrue(User.objects.filter(pk=self.owner.pk).exists())
+        self.assertEqual(Note.objects.filter(user=self.owner).count(), 3)
+
+    def test_queries_do_not_grow_with_rows(self):
+        def purge_queries(notes):
+            user = User.objects.create_user(f'user{notes}')
+            Note.objects.bulk_create([Note(user=user, title='Note') for _ in range(notes)])
+            Profile.objects.filter(user=user).update(is_deleted=True, deleted_at=timezone.now() - timedelta(days=60))
+            with CaptureQueriesContext(connection) as context:
+                self.purge()
+            return len(context.captured_queries)
+
+        self.purge()
+        self.assertEqual(purge_queries(1), purge_queries(50))
+
+
+class BootstrapCacheTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'pw')
+        self.member = User.objects.create_user('member', 'member@example.com', 'pw')
+        self.family = Family.objects.create(name='Home', owner=self.owner)
+        FamilyMember.objects.create(family=self.family, user=self.owner)
+        FamilyMember.objects.create(family=self.family, user=self.member)
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def last_message(self):
+        return self.client.get('/api/bootstrap/').json()['families'][0]['last_message']
+
+    def test_message_outdates_members_payload_without_queries(self):
+        self.assertIsNone(self.last_message())
+
+        with CaptureQueriesContext(connection) as context:
+            message = Message.objects.create(family=self.family, sender=self.owner, content='Hi')
+        self.assertEqual([query['sql'].split(' ', 1)[0] for query in context.captured_queries], ['INSERT'])
+        self.assertEqual(self.last_message()['id'], message.pk)
+
+
+class SendEmailTaskTests(SimpleTestCase):
+    def test_retries_end_while_the_otp_is_valid(self):
+        last_attempt = sum(retry_delay(attempt) for attempt in range(1, send_email.max_attempts))
+        self.assertLess(last_attempt, 600)
@@ -1,15 +1,23 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.contrib.auth.models import User
+from django.contrib.auth.models import User, update_last_login
 from .serializers import UserSerializer, RegisterSerializer, SendOTPSerializer, VerifyOTPSerializer, ForgotPasswordSerializer, GoogleLoginSerializer, CustomTokenObtainPairSerializer
-from rest_framework_simplejwt.tokens import RefreshToken
-from .models import OTPRequest
-from django.core.mail import send_mail
+from .authentication import VersionedRefreshToken
+from rest_framework_simplejwt.settings import api_settings
+from .models import DataExport, OTPRequest, Profile
+from .export import export_row_count, iter_export, start_export
+from .bootstrap import get_bootstrap
+from .tasks import send_email
 from django.conf import settings
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.urls import reverse
+import logging
 import random
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+logger = logging.getLogger(__name__)
+
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
@@ -85,18 +93,15 @@ class SendOTPView(APIView):
             """
 
             # Send Email
-            print(f"------------\nOTP for {email}: {otp}\n------------") 
-            try:
-                send_mail(
-                    subject=f"Self Manager - {title}",
-                    message=f"Your OTP is {otp}", # Fallback
-                    from_email=settings.EMAIL_HOST_USER,
-                    recipient_list=[email],
-                    html_message=html_content,
-                    fail_silently=False,
-                )
-            except Exception as e:
-                print(f"Email send failed: {e}")
+            logger.info("OTP email queued for %s", email)
+            # The code itself only at DEBUG, for local development
+            logger.debug("OTP for %s: %s", email, otp)
+            send_email.enqueue(
+                email,
+                subject=f"Self Manager - {title}",
+                message=f"Your OTP is {otp}", # Fallback
+                html_message=html_content,
+            )
                 
             return Response({"message": "OTP sent successfully."}, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -138,7 +143,7 @@ class RegisterView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
-        refresh = RefreshToken.for_user(user)
+        refresh = VersionedRefreshToken.for_user(user)
         return Response({
             'user': UserSerializer(user).data,
             'refresh': str(refresh),
@@ -152,6 +157,17 @@ class MeView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         return self.request.user
 
+class BootstrapView(APIView):
+    """
+    Everything the home screen needs on launch in one call: profile, families
+    with unread counts, pending join requests for owned families, this month's
+    expense total, open udhar totals and pinned notes.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response(get_bootstrap(request.user, request))
+
 class GoogleLoginView(APIView):
     permission_classes = [permissions.AllowAny]
 
@@ -166,11 +182,13 @@ class GoogleLoginView(APIView):
             if hasattr(user, 'profile') and user.profile.is_deleted:
                 user.profile.is_deleted = False
                 user.profile.deleted_at = None
-                user.profile.save()
+                user.profile.save(update_fields=['is_deleted', 'deleted_at'])
                 recovered = True
 
             # Login successful, generate tokens
-            refresh = RefreshToken.for_user(user)
+            refresh = VersionedRefreshToken.for_user(user)
+            if api_settings.UPDATE_LAST_LOGIN:
+                update_last_login(None, user)
             return Response({
                 'user': UserSerializer(user).data,
                 'refresh': str(refresh),
@@ -192,8 +210,9 @@ class UpdateFCMTokenView(APIView):
         
         # Ensure profile exists (it should via signal, but safety check)
         if hasattr(user, 'profile'):
-            user.profile.fcm_token = token
-            user.profile.save()
+            if user.profile.fcm_token != token:
+                user.profile.fcm_token = token
+                user.profile.save(update_fields=['fcm_token'])
             return Response({"message": "Device token updated successfully"}, status=status.HTTP_200_OK)
         else:
              # Create logic or error? Signals handle it mostly.
@@ -218,6 +237,60 @@ class DeleteAccountView(APIView):
             user.profile.is_deleted = True
             from django.utils import timezone
             user.profile.deleted_at = timezone.now()
-            user.profile.save()
+            user.profile.save(update_fields=['is_deleted', 'deleted_at'])
             return Response({"message": "Account marked for deletion. It will be permanently removed in 30 days."}, status=status.HTTP_200_OK)
         return Response({"error": "Profile not found"}, status=status.HTTP_404_NOT_FOUND)
+
+def _export_status(request, export):
+    data = {
+        'id': export.id,
+        'status': export.status,
+        'created_at': export.created_at,
+        'finished_at': export.finished_at,
+    }
+    if export.status == 'ready':
+        data['download_url'] = request.build_absolute_uri(reverse('data_export_download', args=[export.id]))
+    return Response(data)
+
+class DataExportView(APIView):
+    """
+    GET streams a zip of the user's data built on the fly. Accounts with more
+    than EXPORT_STREAM_MAX_ROWS rows (or ?background=1) get a background export
+    instead: 202 with a job to poll at /api/users/export/<id>/.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+        background = request.query_params.get('background') in ('1', 'true')
+        if background or export_row_count(user) > settings.EXPORT_STREAM_MAX_ROWS:
+            export = (
+                DataExport.objects.filter(user=user, status__in=['pending', 'running']).first()
+                or start_export(user)
+            )
+            response = _export_status(request, export)
+            response.status_code = status.HTTP_202_ACCEPTED
+            return response
+
+        response = StreamingHttpResponse(iter_export(user), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="selfmanager-export-{user.username}.zip"'
+        return response
+
+class DataExportDetailView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, export_id):
+        export = DataExport.objects.filter(pk=export_id, user=request.user).first()
+        if export is None:
+            return Response({"error": "Export not found"}, status=status.HTTP_404_NOT_FOUND)
+        return _export_status(request, export)
+
+class DataExportDownloadView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, export_id):
+        export = DataExport.objects.filter(pk=export_id, user=request.user, status='ready').first()
+        if export is None or not export.file:
+            raise Http404
+        return FileResponse(export.file.open('rb'), as_attachment=True,
+                            filename=f'selfmanager-export-{request.user.username}.zip')